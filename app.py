@@ -1,85 +1,231 @@
-%%writefile app.py
-
 # app.py
 import streamlit as st
-from datetime import datetime, date, time, timedelta
+from datetime import datetime, time, timedelta
+from concurrent.futures import ProcessPoolExecutor
+import heapq
+import html
 import math
+import multiprocessing
+import os
+import secrets
+
+from planner import diagnostics
+from planner.events import EventLog, habit_stats
+from planner.interchange import export_lines, merge_tasks, on_day, read_tasks
+from planner.recurrence import WEEKDAYS, describe_repeat, occurrences, occurs_on, rule_from
+from planner.simulate import (CURRENT, Variant, apply_variant, count_variants, describe_variant, rank_key,
+                              simulate, variants)
+from planner.templates import fixed_overlaps, rule_task, work_task
+from planner.reminders import DesktopSink, QueueSink, ReminderService, WebhookSink, describe
+from planner import (DAY_START, SHIFT_PRESETS, MemoryStore, SortedSchedule, SQLiteStore, Timeline, WeekCalendar,
+                     detect_conflict, format_range, new_task_id, planner_date, seconds_until_change, to_dt)
+
+diagnostics.begin_run()
+diagnostics.section("setup")
 
 # -----------------------
 # Helper utilities
 # -----------------------
-def to_dt(t: time, base_date: date = date.today()):
-    """Convert a time to a datetime on base_date. Handles overnight times gracefully."""
-    dt = datetime.combine(base_date, t)
-    # If the time is for the next day (e.g., 03:00 AM while base_date is today's 10:00 PM), add a day
-    if t < time(4, 0) and datetime.now().time() > time(20, 0):
-        return dt + timedelta(days=1)
-    return dt
-
-def format_range(start_dt: datetime, end_dt: datetime):
-    """Formats a datetime range for display."""
-    return f"{start_dt.strftime('%I:%M %p')} — {end_dt.strftime('%I:%M %p')}"
-
-def overlap(a_start, a_end, b_start, b_end):
-    """Checks if two time intervals overlap."""
-    return a_start < b_end and b_start < a_end
-
-def normalize_schedule(tasks):
+def load_template_day():
     """
-    Ensures that tasks are sequential and don't overlap by shifting
-    the start time of a conflicting task to the end time of the previous one.
+    Rebuilds day_tasks on the shared template for the day, keeping manually
+    added tasks and what was already ticked off.
     """
-    if not tasks:
-        return []
-
-    # Sort tasks by start time
-    tasks_sorted = sorted(tasks, key=lambda x: x["start_time"])
-    fixed = []
-
-    for t in tasks_sorted:
-        current_task = t.copy()
-
-        if not fixed:
-            fixed.append(current_task)
-            continue
-
-        prev = fixed[-1]
-
-        # Check if the current task starts before the previous one ends
-        if current_task["start_time"] < prev["end_time"]:
-            dur = (current_task["end_time"] - current_task["start_time"])
-
-            # Shift the start time to the end of the previous task
-            current_task["start_time"] = prev["end_time"]
-
-            # Calculate the new end time
-            current_task["end_time"] = current_task["start_time"] + dur
-
-        fixed.append(current_task)
-
-    return fixed
+    day = st.session_state.day_tasks
+    st.session_state.day_tasks = SortedSchedule.from_changes(
+        get_calendar().schedule(st.session_state.day_date), added=day.manual_tasks(), completed=day.completed)
+    st.session_state.day_tasks.normalize()
+    log_snapshot()
+
+def get_calendar():
+    """The session's WeekCalendar, rebuilt when a new profile is saved."""
+    cal = st.session_state.get("calendar")
+    if cal is None or cal.profile is not st.session_state.profile:
+        cal = st.session_state.calendar = WeekCalendar(st.session_state.profile)
+    return cal
+
+def get_timeline():
+    """
+    Status timeline for the current day. Rebuilt only when the schedule (including
+    its completions), the planner date or the profile changes.
+    """
+    day, day_date, profile = st.session_state.day_tasks, st.session_state.day_date, st.session_state.profile
+    built_for = st.session_state.get("timeline_for")
+    if built_for is None or built_for[0] is not day or built_for[1] != day.version \
+            or built_for[2] != day_date or built_for[3] is not profile:
+        sleep_at = to_dt(profile["sleep_time"], day_date) if profile.get("sleep_time") else None
+        day_end = datetime.combine(day_date + timedelta(days=1), DAY_START)
+        with diagnostics.span("timeline"):
+            st.session_state.timeline = Timeline(day, day.is_done, carried=get_calendar().spillover(day_date),
+                                                 sleep_at=sleep_at, day_end=day_end)
+        st.session_state.timeline_for = (day, day.version, day_date, profile)
+    return st.session_state.timeline
+
+def done_key(task_id):
+    """Widget key of a task's "Mark done" checkbox. Template IDs repeat every day, so the key carries the day."""
+    return f"done_{st.session_state.day_date}_{task_id}"
+
+def forget_done_widgets():
+    """Drops the checkbox states, e.g. when day_tasks is replaced: they would otherwise outlive its completions."""
+    for key in [k for k in st.session_state if k.startswith("done_")]:
+        del st.session_state[key]
+
+def roll_over_day():
+    """Starts the day from the template when the planner date changes (e.g. a session left open overnight)."""
+    today = planner_date()
+    if st.session_state.day_date == today:
+        return
+    forget_done_widgets()
+    st.session_state.day_date = today
+    st.session_state.holiday_mode = False
+    template = get_calendar().schedule(today)
+    st.session_state.template_tasks = template.tasks
+    st.session_state.day_tasks = SortedSchedule(template)
+    log_snapshot()
 
-def detect_conflict(tasks, new_task):
-    """Detects if a new task conflicts with any existing task."""
-    for t in tasks:
-        if overlap(new_task["start_time"], new_task["end_time"], t["start_time"], t["end_time"]):
-            return True
-    return False
+# -----------------------
+# Persistence
+# -----------------------
+@st.cache_resource
+def get_store():
+    """One store per server process, shared by all sessions. PLANNER_DB=:memory: keeps nothing on disk."""
+    path = os.environ.get("PLANNER_DB", "planner.db")
+    return MemoryStore() if path == ":memory:" else SQLiteStore(path)
 
-def shift_after_insert(tasks, inserted_index):
-    """Shifts all tasks subsequent to the inserted index if they now overlap."""
-    tasks = tasks.copy()
-    for i in range(inserted_index + 1, len(tasks)):
-        prev = tasks[i-1]
-        cur = tasks[i]
+def current_user():
+    """
+    Whose saved state, history and reminders this session uses. A new session
+    gets its own random ID, kept in the URL (?user=...) so a reload or bookmark
+    comes back to the same data; the link is the only key to it, so keep it
+    private. PLANNER_USER=<name> puts every session on one shared user instead.
+    """
+    if "user" not in st.session_state:
+        shared = os.environ.get("PLANNER_USER")
+        st.session_state.user = shared or st.query_params.get("user") or secrets.token_urlsafe(16)
+        if not shared:
+            st.query_params["user"] = st.session_state.user
+    return st.session_state.user
+
+@st.cache_resource
+def get_reminders():
+    """
+    One reminder loop per server process, shared by all sessions. Reminders go to an
+    in-app queue; PLANNER_WEBHOOK=<url> and PLANNER_DESKTOP_NOTIFY=1 add more sinks.
+    """
+    sinks = [QueueSink()]
+    if os.environ.get("PLANNER_WEBHOOK"):
+        sinks.append(WebhookSink(os.environ["PLANNER_WEBHOOK"]))
+    if os.environ.get("PLANNER_DESKTOP_NOTIFY") and DesktopSink().available:
+        sinks.append(DesktopSink())
+    return ReminderService(sinks).start()
+
+def sync_reminders():
+    """Reschedules the user's reminders when today's schedule or its completions change."""
+    day = st.session_state.day_tasks
+    ref = st.session_state.get("reminders_for")
+    if ref is None or ref[0] is not day or ref[1] != day.version:
+        get_reminders().sync(current_user(), day, day.is_done)
+        st.session_state.reminders_for = (day, day.version)
+
+@st.cache_resource
+def get_event_log():
+    """
+    Append-only history of schedule changes, one file per user. PLANNER_EVENTS=<dir>
+    sets where; it is off when PLANNER_DB=:memory: (unless PLANNER_EVENTS is given).
+    """
+    default = "" if os.environ.get("PLANNER_DB") == ":memory:" else "planner-events"
+    path = os.environ.get("PLANNER_EVENTS", default)
+    return EventLog(path) if path else None
+
+def log_snapshot():
+    """Records the whole day schedule; call after replacing day_tasks wholesale."""
+    log = get_event_log()
+    if log is not None and st.session_state.day_date is not None:
+        log.snapshot(current_user(), st.session_state.day_date, st.session_state.day_tasks)
+        st.session_state.logged_day = st.session_state.day_date
+
+def log_events(*events):
+    """
+    Appends (kind, fields) events for changes already made to day_tasks. The
+    session's first change of a day is written as a snapshot instead, which
+    already includes it, so replay never starts from an unknown state.
+    """
+    log = get_event_log()
+    if log is None:
+        return
+    user, day = current_user(), st.session_state.day_date
+    if st.session_state.get("logged_day") == day:
+        due = [log.append(user, day, kind, **fields) for kind, fields in events]
+        if not any(due):
+            return
+    log_snapshot()
+
+@st.cache_resource
+def get_simulation_pool():
+    """
+    Worker processes for what-if runs, shared by all sessions (None on a single core).
+    Spawned rather than forked, since the server process is multi-threaded.
+    """
+    workers = os.cpu_count() or 1
+    if workers < 2:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
 
-        if cur["start_time"] < prev["end_time"]:
-            dur = cur["end_time"] - cur["start_time"]
-            cur["start_time"] = prev["end_time"]
-            cur["end_time"] = cur["start_time"] + dur
-            tasks[i] = cur
+def show_reminders():
+    for reminder in get_reminders().drain(current_user()):
+        st.toast(describe(reminder), icon="⏰")
 
-    return tasks
+def load_saved_state():
+    """
+    Restores the user's saved profile and today's schedule into a new session.
+    The template is not stored: it is rebuilt from the profile (and shared
+    with every other session using the same one).
+    """
+    today = planner_date()
+    saved = get_store().load(current_user(), today.isoformat())
+    for key in ("profile", "holiday_mode"):
+        if key in saved:
+            st.session_state[key] = saved[key]
+    st.session_state.profile_saved = bool(saved.get("profile"))
+    template = get_calendar().schedule(today) if saved.get("profile") else None
+    if template is not None:
+        st.session_state.template_tasks = template.tasks
+    if "day_tasks" in saved:
+        day = saved["day_tasks"]
+        if "tasks" in day:  # full copy, as saved before templates were shared
+            st.session_state.day_tasks = SortedSchedule(day["tasks"], completed=day["completed"])
+        else:
+            st.session_state.day_tasks = SortedSchedule.from_changes(
+                template if day["on_template"] else None, day["added"], day["removed"], day["completed"])
+        st.session_state.day_date = today
+    elif get_event_log() is not None:
+        # Nothing stored for today (e.g. a new database): rebuild it from the history
+        replayed = get_event_log().replay(current_user(), today)
+        if replayed is not None:
+            st.session_state.day_tasks = replayed
+            st.session_state.day_date = today
+    # Remember what was loaded so persist_state doesn't write it straight back
+    st.session_state.saved_refs = {key: st.session_state.get(key) for key in ("profile", "holiday_mode")}
+    if "day_tasks" in st.session_state:
+        st.session_state.saved_refs["day_tasks"] = (st.session_state.day_tasks, st.session_state.day_tasks.version)
+
+def persist_state():
+    """Queues whatever changed since the last call; the store flushes it in the background."""
+    store, user, today = get_store(), current_user(), st.session_state.day_date.isoformat()
+    saved = st.session_state.saved_refs
+    for key, day_key in (("profile", ""), ("holiday_mode", today)):
+        value = st.session_state[key]
+        if saved.get(key) is not value:
+            store.put(user, day_key, key, value)
+            saved[key] = value
+    day = st.session_state.day_tasks
+    ref = saved.get("day_tasks")
+    if ref is None or ref[0] is not day or ref[1] != day.version:
+        # Only the session's delta on the shared template is stored
+        added, removed = day.changes()
+        store.put(user, today, "day_tasks", {"on_template": day.base is not None, "added": added,
+                                             "removed": removed, "completed": day.completed})
+        saved["day_tasks"] = (day, day.version)
 
 # -----------------------
 # Styles (Lightly thicker green: #d6f5d6)
@@ -99,6 +245,8 @@ st.markdown(
     }
     .task-title { font-weight:700; font-size:18px; color: #1a5e22; }
     .task-meta { color:#555; margin-top:6px; font-style: italic; }
+    .task-card.done { opacity: 0.6; }
+    .task-card.done .task-title { text-decoration: line-through; }
     /* Popup style updated to be inline with the task, right under the checkbox */
     .popup-task-complete {
         padding:10px 14px;
@@ -126,26 +274,35 @@ st.markdown(
 # -----------------------
 # Session defaults
 # -----------------------
+if "saved_refs" not in st.session_state: # Lazily restore saved state once per session
+    load_saved_state()
 if "page" not in st.session_state:
     st.session_state.page = "Dashboard"
 if "profile_saved" not in st.session_state:
     st.session_state.profile_saved = False
 if "profile" not in st.session_state:
     st.session_state.profile = {}
-if "template_tasks" not in st.session_state:
-    st.session_state.template_tasks = []
-if "day_tasks" not in st.session_state:
-    st.session_state.day_tasks = []
-if "completed" not in st.session_state:
-    st.session_state.completed = []
+if "template_tasks" not in st.session_state: # Shared, read-only template tasks for day_date
+    st.session_state.template_tasks = ()
+if "day_tasks" not in st.session_state or not isinstance(st.session_state.day_tasks, SortedSchedule):
+    st.session_state.day_tasks = SortedSchedule(st.session_state.get("day_tasks", []))
 if "holiday_mode" not in st.session_state:
     st.session_state.holiday_mode = False
+if "day_date" not in st.session_state: # Planner date that day_tasks belongs to
+    st.session_state.day_date = None
 if "global_message" not in st.session_state: # For general system messages (e.g., saving)
     st.session_state.global_message = ""
-if "just_completed_task_index" not in st.session_state: # To control local popup location
-    st.session_state.just_completed_task_index = -1
+if "just_completed_task_id" not in st.session_state: # To control local popup location
+    st.session_state.just_completed_task_id = None
 if "last_completion_message" not in st.session_state: # To hold the specific message
     st.session_state.last_completion_message = ""
+if "status_interval" not in st.session_state: # Refresh interval the status fragment was registered with
+    st.session_state.status_interval = None
+
+roll_over_day()
+persist_state() # Catches changes made just before the last st.rerun()
+sync_reminders()
+show_reminders()
 
 # -----------------------
 # Sidebar (right) navigation
@@ -160,6 +317,12 @@ with st.sidebar:
         st.session_state.page = "Roadmap"
     if st.button("🧠 Health & Habits"):
         st.session_state.page = "Health"
+    if st.button("🧪 What-if Routines"):
+        st.session_state.page = "Simulate"
+    # Hidden unless timings are being collected or ?diagnostics=1 is in the URL
+    if diagnostics.enabled() or "diagnostics" in st.query_params:
+        if st.button("🩺 Diagnostics"):
+            st.session_state.page = "Diagnostics"
     st.markdown("---")
 
     current_holiday_mode = st.session_state.holiday_mode
@@ -167,16 +330,21 @@ with st.sidebar:
 
     if holiday != current_holiday_mode:
         st.session_state.holiday_mode = holiday
+        forget_done_widgets()
         if holiday:
-            st.session_state.day_tasks = []
+            st.session_state.day_tasks = SortedSchedule()
+            log_snapshot()
             st.session_state.global_message = "Holiday Mode enabled. Schedule cleared for manual input."
         else:
             if st.session_state.template_tasks:
-                st.session_state.day_tasks = normalize_schedule(st.session_state.template_tasks)
+                st.session_state.day_tasks = SortedSchedule(get_calendar().schedule(st.session_state.day_date))
+                log_snapshot()
                 st.session_state.global_message = "Holiday Mode disabled. Template schedule restored."
             else:
                  st.session_state.global_message = "Holiday Mode disabled. Please set up a Profile template."
 
+diagnostics.section(f"page:{st.session_state.page}")
+
 # -----------------------
 # Profile page: setup
 # -----------------------
@@ -188,17 +356,10 @@ if st.session_state.page == "Profile":
     role = st.selectbox("Role", ["Student","Working Professional","Tester","Other"], index=["Student","Working Professional","Tester","Other"].index(st.session_state.profile.get("role", "Student")))
 
     st.subheader("Work / Study Shift")
-    shift_options = ["Morning shift (7–15)","Day shift (9–17)","Night shift (22–06)","Custom"]
+    shift_options = list(SHIFT_PRESETS) + ["Custom"]
     shift_type = st.selectbox("Choose a typical shift", shift_options, index=shift_options.index(st.session_state.profile.get("shift_type", "Day shift (9–17)")))
 
-    default_ws = time(9,0); default_we = time(17,0)
-    if shift_type != "Custom":
-        if shift_type.startswith("Morning"):
-            default_ws = time(7,0); default_we = time(15,0)
-        elif shift_type.startswith("Day"):
-            default_ws = time(9,0); default_we = time(17,0)
-        elif shift_type.startswith("Night"):
-            default_ws = time(22,0); default_we = time(6,0)
+    default_ws, default_we = SHIFT_PRESETS.get(shift_type, (time(9,0), time(17,0)))
 
     work_start = st.time_input("Work / College Start", value=st.session_state.profile.get("work_start", default_ws))
     work_end = st.time_input("Work / College End", value=st.session_state.profile.get("work_end", default_we))
@@ -232,6 +393,54 @@ if st.session_state.page == "Profile":
     st.caption("Dinner duration: 60 minutes.")
     st.markdown("---")
 
+    st.subheader("🔁 Recurring tasks")
+    st.caption("Stored once as a rule and added to the days it falls on.")
+    if "rules_draft" not in st.session_state:
+        st.session_state.rules_draft = list(st.session_state.profile.get("rules", []))
+    rules_draft = st.session_state.rules_draft
+    for n, record in enumerate(rules_draft):
+        rule = rule_from(record)
+        upcoming = next(occurrences(rule, st.session_state.day_date, st.session_state.day_date + timedelta(days=366)), None)
+        rc1, rc2 = st.columns([5, 1])
+        rc1.write(f"**{rule.title}** at {rule.start_time.strftime('%I:%M %p')} for {rule.minutes} min, "
+                  f"{describe_repeat(rule.repeat)}{' (fixed time)' if rule.fixed else ''}"
+                  + (f" — next {upcoming.strftime('%a %d %b')}" if upcoming else " — no more dates"))
+        rc2.button("Remove", key=f"rule_remove_{rule.id}", on_click=rules_draft.pop, args=(n,))
+        if rule.fixed and upcoming:
+            # Fixed blocks never move for each other: point out the overlap instead
+            others = [rule_task(r, upcoming) for r in map(rule_from, rules_draft) if r.fixed and r.id != rule.id and occurs_on(r, upcoming)]
+            mine = rule_task(rule, upcoming)
+            clashes = [b if a is mine else a for a, b in fixed_overlaps([mine, work_task(work_start, work_end, upcoming)] + others) if mine is a or mine is b]
+            if clashes:
+                rc1.warning(f"Overlaps {', '.join(t['title'] for t in clashes)} on {upcoming.strftime('%a %d %b')}; "
+                            "fixed tasks are kept where they are, so both stay at their times.")
+
+    with st.form("add_rule", clear_on_submit=True):
+        r_title = st.text_input("Title", key="rule_title")
+        rc1, rc2 = st.columns(2)
+        r_start = rc1.time_input("Time", value=time(18, 0), key="rule_start")
+        r_minutes = rc2.number_input("Duration (minutes)", min_value=5, max_value=600, value=30, key="rule_minutes")
+        r_kind = st.selectbox("Repeats", ["Every day", "Weekdays (Mon–Fri)", "On selected weekdays", "Every N days", "Monthly"], key="rule_kind")
+        rc1, rc2, rc3 = st.columns(3)
+        r_days = rc1.multiselect("Weekdays", WEEKDAYS, format_func=str.title, key="rule_days")
+        r_every = rc2.number_input("N (every N days)", min_value=2, max_value=365, value=2, key="rule_every")
+        r_dom = rc3.number_input("Day of month", min_value=1, max_value=31, value=1, key="rule_dom")
+        r_fixed = st.checkbox("Fixed time (other tasks move around it)", key="rule_fixed")
+        if st.form_submit_button("Add recurring task"):
+            repeat = {"Every day": "daily", "Weekdays (Mon–Fri)": "weekdays", "On selected weekdays": "weekly:" + ",".join(r_days),
+                      "Every N days": f"every:{int(r_every)}", "Monthly": f"monthly:{int(r_dom)}"}[r_kind]
+            if not r_title:
+                st.warning("Please enter a title for the recurring task.")
+            elif r_kind == "On selected weekdays" and not r_days:
+                st.warning("Please pick at least one weekday.")
+            else:
+                rules_draft.append({"id": new_task_id(), "title": r_title, "start_time": r_start, "minutes": int(r_minutes),
+                                    "repeat": repeat, "since": st.session_state.day_date, "fixed": r_fixed})
+                st.rerun()
+    if rules_draft != st.session_state.profile.get("rules", []):
+        st.caption("Recurring tasks changed: press Save Daily Template to apply them.")
+    st.markdown("---")
+
     if st.button("Save Daily Template"):
         profile = {
             "name": name,
@@ -246,47 +455,17 @@ if st.session_state.page == "Profile":
             "breakfast_time": breakfast_time,
             "evening_habits": evening_selected,
             "evening_times": evening_times,
-            "dinner_time": dinner_time
+            "dinner_time": dinner_time,
+            "rules": list(rules_draft),
         }
         st.session_state.profile = profile
         st.session_state.profile_saved = True
 
-        # --- Template Tasks Generation ---
-        template = []
-
-        # 1. Morning Habits
-        for h in profile["morning_habits"]:
-            s = to_dt(profile["morning_times"][h])
-            dur = 30 if h=="Jogging/Walking" else 20 if h=="Meditation" else 45 if h=="Reading" else 20
-            template.append({"title": h, "start_time": s, "end_time": s+timedelta(minutes=dur)})
-
-        # 2. Breakfast (20 mins)
-        bstart = to_dt(profile["breakfast_time"])
-        template.append({"title":"Breakfast","start_time":bstart,"end_time":bstart+timedelta(minutes=20)})
-
-        # 3. Work / College (main block)
-        ws = to_dt(profile["work_start"])
-        we = to_dt(profile["work_end"])
-        if we <= ws:
-            we += timedelta(days=1)
-
-        template.append({"title":"Work / College","start_time":ws,"end_time":we,"meta":{"fixed":True}})
-
-        # 4. Dinner (60 mins)
-        dstart = to_dt(profile["dinner_time"])
-        template.append({"title":"Dinner","start_time":dstart,"end_time":dstart+timedelta(minutes=60)})
-
-        # 5. Evening Habits
-        for h in profile["evening_habits"]:
-            s = to_dt(profile["evening_times"][h])
-            dur = 45 if h=="Reading" else 30
-            template.append({"title": h, "start_time": s, "end_time": s+timedelta(minutes=dur)})
-
-        # Normalize and save to template
-        st.session_state.template_tasks = normalize_schedule(template)
+        # --- Template Tasks Generation (memoized per profile fingerprint + date) ---
+        st.session_state.template_tasks = get_calendar().schedule(st.session_state.day_date).tasks
 
         if not st.session_state.holiday_mode:
-            st.session_state.day_tasks = st.session_state.template_tasks
+            load_template_day()
 
         st.session_state.global_message = "Template saved and daily schedule updated (if not in Holiday Mode)."
         st.success(st.session_state.global_message)
@@ -300,196 +479,320 @@ if st.session_state.page == "Profile":
 # -----------------------
 elif st.session_state.page == "Dashboard":
     st.title(" Daily Dashboard")
-    st.caption(f"Today: {datetime.now().strftime('%A, %d %b %Y')}")
-
-    # Re-normalize day_tasks based on mode and template
-    if not st.session_state.holiday_mode and st.session_state.template_tasks:
-        template_titles = {t['title'] for t in st.session_state.template_tasks}
-        manual_tasks = [t for t in st.session_state.day_tasks if t['title'] not in template_titles or t not in st.session_state.template_tasks]
+    st.caption(f"Today: {st.session_state.day_date.strftime('%A, %d %b %Y')}")
 
-        full_tasks = [t.copy() for t in st.session_state.template_tasks] + manual_tasks
-        st.session_state.day_tasks = normalize_schedule(full_tasks)
-
-    now = datetime.now()
+    # day_tasks is kept sorted and normalized as it is edited, so an
+    # unchanged schedule needs no work here; only catch up a pending insert.
+    st.session_state.day_tasks.normalize()
 
     # Display action messages (non-completion related)
     if st.session_state.global_message:
         st.info(st.session_state.global_message)
         st.session_state.global_message = ""
 
+    # The Dashboard is split into fragments so that ticking a box, typing in the
+    # add form or moving the week slider only reruns that region. Anything that
+    # changes what the status banner shows asks for a full rerun instead.
+
+    def status_wait(now, ongoing, next_task):
+        """Seconds until the banner text changes (countdown tick, or the timeline's next boundary)."""
+        boundary = get_timeline().next_boundary(now)
+        return seconds_until_change(now, ongoing, next_task, later=[boundary] if boundary else [])
+
     # ------------------
     # Timer / Status Update (Ignores completed tasks)
     # ------------------
-    next_task = None
-    ongoing = None
-    tasks_sorted = sorted(st.session_state.day_tasks, key=lambda x: x["start_time"]) if st.session_state.day_tasks else []
-
-    for t in tasks_sorted:
-        is_completed = t["title"] in st.session_state.completed
-
-        if t["start_time"] <= now <= t["end_time"] and not is_completed:
-            ongoing = t
-            break
-
-        if t["start_time"] > now and next_task is None and not is_completed:
-            next_task = t
-
-    if ongoing:
-        time_left = ongoing["end_time"] - now
-        total_seconds = time_left.total_seconds()
-        # Use floor for minutes remaining, as ceiling can be misleading when close to 0
-        minutes = math.floor(total_seconds / 60)
-
-        status_message = f"🔹 **Ongoing: {ongoing['title']}** "
-        if minutes > 1:
-            status_message += f"({format_range(ongoing['start_time'], ongoing['end_time'])}). **{minutes} min** remaining."
-        elif minutes == 1:
-            status_message += f"({format_range(ongoing['start_time'], ongoing['end_time'])}). **1 min** remaining."
-        else:
-             status_message += f"({format_range(ongoing['start_time'], ongoing['end_time'])}). Ending now."
-
-        st.markdown(f"<div class='popup-status'>{status_message}</div>", unsafe_allow_html=True)
-    elif next_task:
-        time_to_start = next_task["start_time"] - now
-        total_seconds = time_to_start.total_seconds()
-        minutes = math.ceil(total_seconds / 60)
-
-        status_message = f"⏰ **Next: {next_task['title']}** at {next_task['start_time'].strftime('%I:%M %p')}. "
-        if minutes > 1:
-            status_message += f"Starts in **{minutes} min**."
-        elif minutes == 1:
-            status_message += f"Starts in **1 min**."
+    def status_banner():
+        """Renders the Ongoing / Next banner; as a fragment it wakes exactly when the text would change."""
+        st.session_state.status_stale = False
+        show_reminders() # The banner wakes at task boundaries, which is when reminders fire
+        now = datetime.now()
+        if planner_date(now) != st.session_state.day_date:
+            st.rerun(scope="app") # New planner day: let roll_over_day() start it
+
+        timeline = get_timeline()
+        ongoing, next_task = timeline.status(now)
+
+        if ongoing:
+            time_left = ongoing["end_time"] - now
+            total_seconds = time_left.total_seconds()
+            # Use floor for minutes remaining, as ceiling can be misleading when close to 0
+            minutes = math.floor(total_seconds / 60)
+
+            status_message = f"🔹 **Ongoing: {html.escape(ongoing['title'])}** "
+            if minutes > 1:
+                status_message += f"({format_range(ongoing['start_time'], ongoing['end_time'])}). **{minutes} min** remaining."
+            elif minutes == 1:
+                status_message += f"({format_range(ongoing['start_time'], ongoing['end_time'])}). **1 min** remaining."
+            else:
+                 status_message += f"({format_range(ongoing['start_time'], ongoing['end_time'])}). Ending now."
+
+            st.markdown(f"<div class='popup-status'>{status_message}</div>", unsafe_allow_html=True)
+        elif next_task:
+            time_to_start = next_task["start_time"] - now
+            total_seconds = time_to_start.total_seconds()
+            minutes = math.ceil(total_seconds / 60)
+
+            status_message = f"⏰ **Next: {html.escape(next_task['title'])}** at {next_task['start_time'].strftime('%I:%M %p')}. "
+            if minutes > 1:
+                status_message += f"Starts in **{minutes} min**."
+            elif minutes == 1:
+                status_message += f"Starts in **1 min**."
+            else:
+                 status_message += "Starting now."
+
+            st.markdown(f"<div class='popup-status'>{status_message}</div>", unsafe_allow_html=True)
         else:
-             status_message += "Starting now."
+            # Sleep or All Done message
+            if timeline.sleeping(now):
+                 st.markdown("<div class='popup-status'>💤 Sleep well! Good night!</div>", unsafe_allow_html=True)
+            elif timeline.all_done:
+                st.markdown("<div class='popup-status'>🎉 All scheduled tasks are complete for today!</div>", unsafe_allow_html=True)
+
+        # run_every is fixed when the fragment is registered (on a full run). If
+        # the next change is no longer one interval away, re-register it.
+        wait = status_wait(now, ongoing, next_task)
+        registered = st.session_state.status_interval
+        if (wait is None) != (registered is None) or (wait is not None and abs(wait - registered) > 2):
+            st.rerun(scope="app")
 
-        st.markdown(f"<div class='popup-status'>{status_message}</div>", unsafe_allow_html=True)
-    else:
-        # Sleep or All Done message
-        sleep_dt = to_dt(st.session_state.profile.get("sleep_time", time(23,0)))
-        if st.session_state.profile and (now.time() >= sleep_dt.time() or (now.time() < time(4,0) and sleep_dt.time() > time(20,0))):
-             st.markdown("<div class='popup-status'>💤 Sleep well! Good night!</div>", unsafe_allow_html=True)
-        elif st.session_state.day_tasks and len(st.session_state.completed) == len(st.session_state.day_tasks):
-            st.markdown("<div class='popup-status'>🎉 All scheduled tasks are complete for today!</div>", unsafe_allow_html=True)
+    now = datetime.now()
+    st.session_state.status_interval = status_wait(now, *get_timeline().status(now))
+    st.fragment(run_every=st.session_state.status_interval)(status_banner)()
 
     st.markdown("---")
     # ------------------
     # Add manual tasks
     # ------------------
-    st.subheader("➕ Add a Task (manual)")
-
-    col1, col2, col3 = st.columns([4,2,2])
-    with col1: m_title = st.text_input("Task title", key="manual_title")
-    with col2: m_start = st.time_input("Start time", key="manual_start", value=now.time())
-    with col3: m_dur = st.number_input("Duration (minutes)", min_value=5, max_value=600, value=30, key="manual_dur")
-
-    add_pressed = st.button("Add Task to Day (Check Conflicts)")
-
-    if add_pressed and m_title:
-        new_start = to_dt(m_start)
-        new_end = new_start + timedelta(minutes=int(m_dur))
-        new_task = {"title": m_title, "start_time": new_start, "end_time": new_end}
-
-        target_tasks = st.session_state.day_tasks.copy()
-        conflict = detect_conflict(target_tasks, new_task)
-
-        if conflict:
-            st.error("Conflict detected with existing schedule!")
-            st.markdown("The new task conflicts with another activity. How would you like to proceed?")
-
-            choice = st.radio("Conflict Resolution:",
-                              ["1. System: Shift subsequent tasks automatically",
-                               "2. User: I will adjust the start time manually and try again"],
-                              key="conflict_choice_add")
-
-            if choice.startswith("1."):
-                new_list = target_tasks + [new_task]
-                new_list = sorted(new_list, key=lambda x: x["start_time"])
-                inserted_index = next((i for i, t in enumerate(new_list) if t["title"] == m_title and t["start_time"] == new_start), -1)
-
-                if inserted_index != -1:
-                    new_list = shift_after_insert(new_list, inserted_index)
-                    st.session_state.day_tasks = normalize_schedule(new_list)
-                    st.session_state.global_message = "Task added, and schedule was automatically shifted to resolve conflict."
-                    st.rerun()
+    @st.fragment
+    def add_task_form():
+        st.subheader("➕ Add a Task (manual)")
+
+        col1, col2, col3 = st.columns([4,2,2])
+        with col1: m_title = st.text_input("Task title", key="manual_title")
+        with col2: m_start = st.time_input("Start time", key="manual_start", value=datetime.now().time())
+        with col3: m_dur = st.number_input("Duration (minutes)", min_value=5, max_value=600, value=30, key="manual_dur")
+
+        add_pressed = st.button("Add Task to Day (Check Conflicts)")
+
+        if add_pressed and m_title:
+            new_start = to_dt(m_start, st.session_state.day_date)
+            new_end = new_start + timedelta(minutes=int(m_dur))
+            new_task = {"id": new_task_id(), "title": m_title, "start_time": new_start, "end_time": new_end, "meta": {"manual": True}}
+
+            conflict = detect_conflict(st.session_state.day_tasks.index, new_task)
+
+            if conflict:
+                st.error("Conflict detected with existing schedule!")
+                st.markdown("Overlaps with: " + ", ".join(f"**{t['title']}** ({format_range(t['start_time'], t['end_time'])})" for t in conflict))
+                st.markdown("The new task conflicts with another activity. How would you like to proceed?")
+
+                choice = st.radio("Conflict Resolution:",
+                                  ["1. System: Shift subsequent tasks automatically",
+                                   "2. User: I will adjust the start time manually and try again"],
+                                  key="conflict_choice_add")
+
+                if choice.startswith("1."):
+                    moved = st.session_state.day_tasks.insert_and_shift(new_task)
+                    log_events(("add", {"task": new_task}),
+                               *(("shift", {"id": t["id"], "start": t["start_time"], "end": t["end_time"]}) for t in moved))
+                    st.session_state.global_message = f"Task added, and {len(moved)} task(s) were automatically shifted to resolve the conflict (fixed blocks stay put)."
+                    st.rerun(scope="app")
+                else:
+                    st.info("Please adjust the Start Time and/or Duration above, and press 'Add Task to Day (Check Conflicts)' again.")
+
             else:
-                st.info("Please adjust the Start Time and/or Duration above, and press 'Add Task to Day (Check Conflicts)' again.")
+                st.session_state.day_tasks.insert(new_task)
+                log_events(("add", {"task": new_task}))
+                st.session_state.global_message = "Task added successfully. No conflicts detected."
+                st.rerun(scope="app")
 
-        else:
-            st.session_state.day_tasks.append(new_task)
-            st.session_state.day_tasks = normalize_schedule(st.session_state.day_tasks)
-            st.session_state.global_message = "Task added successfully. No conflicts detected."
-            st.rerun()
+        elif add_pressed and not m_title:
+             st.warning("Please enter a title for the task.")
+
+    add_task_form()
 
-    elif add_pressed and not m_title:
-         st.warning("Please enter a title for the task.")
+    # ------------------
+    # Import / export (.ics or .csv)
+    # ------------------
+    with st.expander("📥 Import / 📤 Export calendar"):
+        upload = st.file_uploader("Calendar file (.ics or .csv)", type=["ics", "csv"], key="import_file")
+        on_conflict = st.radio("If an imported task overlaps the schedule", ["Skip it", "Shift later tasks"], key="import_conflict")
+        if st.button("Import today's events", disabled=upload is None):
+            try:
+                tasks = on_day(read_tasks(upload, day=st.session_state.day_date), st.session_state.day_date)
+                result = merge_tasks(st.session_state.day_tasks, tasks, "skip" if on_conflict == "Skip it" else "shift")
+            except (ValueError, KeyError, UnicodeError) as e:
+                st.error(f"Could not read {upload.name}: {e}")
+            else:
+                log_events(*(("add", {"task": t}) for t in result.added),
+                           *(("shift", {"id": t["id"], "start": t["start_time"], "end": t["end_time"]}) for t in result.moved))
+                imported = {t["id"] for t in result.added}
+                shifted = [t for t in result.moved if t["id"] not in imported]
+                st.session_state.global_message = (
+                    f"Imported {len(result.added)} task(s) from {upload.name}"
+                    + (f"; {len(result.skipped)} overlapping task(s) skipped" if result.skipped else "")
+                    + (f"; {result.duplicates} already in the schedule" if result.duplicates else "")
+                    + (f"; {len(shifted)} existing task(s) shifted" if shifted else "") + ".")
+
+        e1, e2 = st.columns(2)
+        export_days = e1.selectbox("Export", [1, 7, 30], format_func=lambda n: "Today" if n == 1 else f"Next {n} days", key="export_days")
+        export_fmt = e2.selectbox("Format", ["ics", "csv"], key="export_fmt")
+        today = st.session_state.day_date
+        days = [(today, st.session_state.day_tasks)]
+        if export_days > 1:
+            days += get_calendar().week(today + timedelta(days=1), export_days - 1)
+        st.download_button("Download", "".join(export_lines(days, export_fmt, st.session_state.profile.get("name", ""))),
+                           file_name=f"planner-{today.isoformat()}.{export_fmt}",
+                           mime="text/calendar" if export_fmt == "ics" else "text/csv")
 
     st.markdown("---")
     # ------------------
     # Display tasks
     # ------------------
-    st.subheader("📋 Today's Schedule")
-    display_tasks = st.session_state.day_tasks
+    PAGE_SIZES = [10, 25, 50, 100]
 
-    if not display_tasks:
-        st.info("No tasks for today yet. Add a task above!")
-    else:
-        remaining = len([t for t in display_tasks if t["title"] not in st.session_state.completed])
-        st.write(f"Remaining tasks: **{remaining}** • Total: **{len(display_tasks)}**")
-
-        task_list_placeholder = st.empty()
-
-        with task_list_placeholder.container():
-            for i, t in enumerate(display_tasks):
-                title = t["title"]
-                rng = format_range(t["start_time"], t["end_time"])
-                done = title in st.session_state.completed
-
-                # Task card display
-                st.markdown(f"<div class='task-card'><div class='task-title'>{title}</div><div class='task-meta'>{rng}</div></div>", unsafe_allow_html=True)
-
-                # Checkbox to mark as done
-                ck = st.checkbox(f"Mark done: {title}", value=done, key=f"done_{i}")
+    def toggle_done(task):
+        """Checkbox callback: runs before the list fragment reruns, so the list renders the new state."""
+        display_tasks = st.session_state.day_tasks
+        task_id, title = task["id"], task["title"]
+        affects_status = any(x is not None and x["id"] == task_id for x in get_timeline().status(datetime.now()))
 
-                # Update completion status
-                if ck and title not in st.session_state.completed:
-                    st.session_state.completed.append(title)
+        if st.session_state[done_key(task_id)]:
+            display_tasks.mark_done(task_id)
+            log_events(("complete", {"id": task_id}))
 
-                    st.session_state.just_completed_task_index = i
+            st.session_state.just_completed_task_id = task_id
 
-                    # --- START OF CUSTOM MESSAGE LOGIC (THE CHANGE) ---
-                    message = f"✅ Task '{title}' completed successfully!"
+            # --- START OF CUSTOM MESSAGE LOGIC (THE CHANGE) ---
+            message = f"✅ Task '{html.escape(title)}' completed successfully!"
 
-                    if title == "Work / College":
-                        message += " Fantastic work! Your focus period is over. Now, step away from your desk for 10 minutes: Take a **slight walk**, **go out for fresh air**, or **drink a glass of water** to refresh before your next task."
+            if title == "Work / College":
+                message += " Fantastic work! Your focus period is over. Now, step away from your desk for 10 minutes: Take a **slight walk**, **go out for fresh air**, or **drink a glass of water** to refresh before your next task."
 
-                    elif (t["end_time"] - t["start_time"]).total_seconds() / 60 >= 60:
-                        # Generic message for other long tasks (like Reading, Study sessions)
-                        message += " Well done on completing a focused block! Take a 5-minute break now."
+            elif (task["end_time"] - task["start_time"]).total_seconds() / 60 >= 60:
+                # Generic message for other long tasks (like Reading, Study sessions)
+                message += " Well done on completing a focused block! Take a 5-minute break now."
 
-                    # --- END OF CUSTOM MESSAGE LOGIC ---
+            # --- END OF CUSTOM MESSAGE LOGIC ---
 
-                    st.session_state.last_completion_message = message
-                    st.rerun()
-
-                elif not ck and title in st.session_state.completed:
-                    st.session_state.completed.remove(title)
-                    st.session_state.global_message = f"Task '{title}' marked incomplete."
-                    st.session_state.just_completed_task_index = -1 # Clear local message marker
-                    st.rerun()
-
-                # --- Display completion message right below the task ---
-                if i == st.session_state.get("just_completed_task_index", -1):
-                    # Check if the task is still marked as completed before displaying the message
-                    if title in st.session_state.completed:
-                        st.markdown(f"<div class='popup-task-complete'>{st.session_state.last_completion_message}</div>", unsafe_allow_html=True)
-                        # Only clear the message marker after display
-                        st.session_state.just_completed_task_index = -1
-                        st.session_state.last_completion_message = ""
+            st.session_state.last_completion_message = message
+        else:
+            display_tasks.mark_undone(task_id)
+            log_events(("uncomplete", {"id": task_id}))
+            st.toast(f"Task '{title}' marked incomplete.")
+            st.session_state.just_completed_task_id = None # Clear local message marker
+
+        # The banner also changes when the day flips between "all done" and not
+        st.session_state.status_stale = affects_status or display_tasks.remaining <= 1
+        persist_state() # Fragment reruns skip the end-of-script save
+        sync_reminders()
+
+    def set_list_page(page):
+        st.session_state.list_page = page
+
+    @st.fragment
+    def schedule_list():
+        if st.session_state.get("status_stale"):
+            st.rerun(scope="app")
+
+        st.subheader("📋 Today's Schedule")
+        display_tasks = st.session_state.day_tasks
+
+        if not display_tasks:
+            st.info("No tasks for today yet. Add a task above!")
+            return
+
+        st.write(f"Remaining tasks: **{display_tasks.remaining}** • Total: **{len(display_tasks)}**")
+
+        # Filters and paging: only the tasks on the current page are rendered
+        f1, f2, f3 = st.columns(3)
+        hide_done = f1.checkbox("Collapse completed", key="list_hide_done")
+        upcoming_only = f2.checkbox("Only upcoming", key="list_upcoming")
+        page_size = f3.selectbox("Tasks per page", PAGE_SIZES, index=1, key="list_page_size")
+
+        now = datetime.now()
+        with diagnostics.span("schedule_list:filter"):
+            visible = [
+                t for t in display_tasks
+                if not (hide_done and display_tasks.is_done(t["id"]))
+                and not (upcoming_only and t["end_time"] <= now)
+            ]
+        if not visible:
+            st.info("No tasks match the current filters.")
+            return
+
+        pages = max(1, math.ceil(len(visible) / page_size))
+        page = min(st.session_state.get("list_page", 0), pages - 1)
+        page_tasks = visible[page * page_size:(page + 1) * page_size]
+
+        # All cards on the page go out as a single HTML block
+        just_completed = st.session_state.get("just_completed_task_id")
+        with diagnostics.span("schedule_list:cards"):
+            cards = []
+            for t in page_tasks:
+                done = display_tasks.is_done(t["id"])
+                rng = format_range(t["start_time"], t["end_time"])
+                preferred = t.get("meta", {}).get("preferred")
+                if preferred is not None and preferred != t["start_time"]:
+                    rng += f" (preferred {preferred.strftime('%I:%M %p')})"
+                cards.append(
+                    f"<div class='task-card{' done' if done else ''}'>"
+                    f"<div class='task-title'>{html.escape(t['title'])}</div>"
+                    f"<div class='task-meta'>{rng}</div></div>"
+                )
+                # --- Completion message right below the task ---
+                if t["id"] == just_completed and done:
+                    cards.append(f"<div class='popup-task-complete'>{st.session_state.last_completion_message}</div>")
+                    # Only clear the message marker after display
+                    st.session_state.just_completed_task_id = None
+                    st.session_state.last_completion_message = ""
+            st.markdown("".join(cards), unsafe_allow_html=True)
+
+        # Checkboxes are keyed by day and task id, so inserting a task doesn't remount the others
+        with diagnostics.span("schedule_list:checkboxes"):
+            cols = st.columns(2)
+            for n, t in enumerate(page_tasks):
+                cols[n % 2].checkbox(f"Mark done: {t['title']}", value=display_tasks.is_done(t["id"]),
+                                     key=done_key(t["id"]), on_change=toggle_done, args=(t,))
+
+        if pages > 1:
+            prev_col, info_col, next_col = st.columns([1, 2, 1])
+            prev_col.button("◀ Previous", disabled=page == 0, key="list_prev", on_click=set_list_page, args=(page - 1,))
+            info_col.caption(f"Page {page + 1} of {pages} • {len(visible)} tasks shown")
+            next_col.button("Next ▶", disabled=page == pages - 1, key="list_next", on_click=set_list_page, args=(page + 1,))
 
         # All done message (if general status did not cover it)
-        if len(st.session_state.completed) == len(display_tasks) and len(display_tasks) > 0 and not ongoing and not next_task:
+        if get_timeline().all_done and get_timeline().status(datetime.now()) == (None, None):
             st.markdown("<div class='popup-status'>🎉 All tasks finished for today — well done!</div>", unsafe_allow_html=True)
 
+    schedule_list()
+
+    st.markdown("---")
+    # ------------------
+    # Week view (only the days on screen are materialized)
+    # ------------------
+    @st.fragment
+    def week_view():
+        st.subheader("🗓️ Week View")
+        if not st.session_state.profile:
+            st.info("Save a Profile template to see the coming days.")
+            return
+
+        wcol1, wcol2 = st.columns([2,3])
+        with wcol1: week_start = st.date_input("From", value=st.session_state.day_date, key="week_start")
+        with wcol2: week_days = st.slider("Days to show", min_value=1, max_value=7, value=3, key="week_days")
+
+        for col, (d, tasks) in zip(st.columns(week_days), get_calendar().week(week_start, week_days)):
+            if d == st.session_state.day_date:
+                tasks = st.session_state.day_tasks  # today as edited, not the bare template
+            with col:
+                st.markdown(f"**{d.strftime('%a %d %b')}**")
+                for t in tasks:
+                    st.caption(f"{t['start_time'].strftime('%I:%M %p')} · {t['title']}")
+
+    week_view()
+
 # -----------------------
 # Career Roadmap
 # -----------------------
@@ -570,5 +873,134 @@ elif st.session_state.page == "Health":
     for s in suggestions:
         st.write("🔹", s)
 
+    if get_event_log() is not None:
+        st.markdown("---")
+        st.subheader("📈 Your habit history")
+        since_days = st.selectbox("Period", [7, 30, 90, 365], index=1, format_func=lambda n: f"Last {n} days", key="history_days")
+        stats = habit_stats(get_event_log(), users=[current_user()],
+                            since=st.session_state.day_date - timedelta(days=since_days - 1))
+        if not stats:
+            st.info("No history yet. Completed and added tasks are recorded from today on.")
+        else:
+            st.dataframe([
+                {"task": title, "days": x["days"], "completed": x["completed"], "completion %": round(100 * x["rate"]),
+                 "avg drift (min)": None if x["mean_drift"] is None else round(x["mean_drift"], 1)}
+                for title, x in stats.items()
+            ], hide_index=True)
+            st.caption("Drift: how far a task ended up from its preferred start time (positive = later).")
+
+    if st.button("Back to Dashboard"):
+        st.session_state.page = "Dashboard"
+
+# -----------------------
+# What-if page: compare alternative routines
+# -----------------------
+elif st.session_state.page == "Simulate":
+    st.title("🧪 What-if Routines")
+    st.info("Try other shifts, habit orders and habit times, and see which routine leaves the fewest clashes, "
+            "the least moving around and the most free time.")
+
+    profile = st.session_state.profile
+    if not st.session_state.profile_saved:
+        st.warning("Save a Profile template first; the variants are built from it.")
+    else:
+        shift_choices = list(SHIFT_PRESETS) + [CURRENT]
+        sim_shifts = st.multiselect("Shifts", shift_choices, default=shift_choices, key="sim_shifts",
+                                    format_func=lambda s: "Current (your hours)" if s == CURRENT else s)
+        sc1, sc2 = st.columns(2)
+        sim_orders = sc1.checkbox("Try every habit order", value=True, key="sim_orders")
+        sim_offsets = sc2.multiselect("Move habit times by (minutes)", [-60, -30, 0, 30, 60], default=[-30, 0, 30], key="sim_offsets")
+        sim_day = st.date_input("Day to simulate", value=st.session_state.day_date, key="sim_day")
+        total = count_variants(profile, sim_shifts, sim_orders, sim_offsets or [0])
+        st.caption(f"{total:,} variant(s) to score.")
+
+        if st.button("Run simulation", disabled=not sim_shifts):
+            progress = st.progress(0.0, text="Scoring…")
+            best = []
+            found = simulate(profile, variants(profile, sim_shifts, sim_orders, sim_offsets or [0]), sim_day,
+                             executor=get_simulation_pool())
+            for n, result in enumerate(found, 1):
+                entry = (tuple(-k for k in rank_key(result)), n, result)
+                (heapq.heappush if len(best) < 20 else heapq.heappushpop)(best, entry)
+                if n % 64 == 0 or n == total:
+                    progress.progress(n / total, text=f"Scored {n:,} of {total:,}")
+            progress.empty()
+            st.session_state.sim_results = [r for _, _, r in sorted(best, key=lambda e: rank_key(e[2]))]
+            baseline = Variant(CURRENT, tuple(profile.get("morning_habits", ())), tuple(profile.get("evening_habits", ())), 0)
+            st.session_state.sim_baseline = next(simulate(profile, [baseline], sim_day))
+
+        results = st.session_state.get("sim_results")
+        if results:
+            base = st.session_state.sim_baseline
+            st.subheader("Best routines")
+            st.dataframe(
+                [{"routine": "Your current routine", "conflicts": base.conflicts, "drift (min)": base.drift, "free (min)": base.free}]
+                + [{"routine": describe_variant(r.variant), "conflicts": r.conflicts, "drift (min)": r.drift, "free (min)": r.free}
+                   for r in results],
+                hide_index=True)
+            st.caption("Conflicts: tasks that clash at their preferred times. Drift: minutes tasks had to move. "
+                       "Free: waking minutes left over.")
+            pick = st.selectbox("Routine", range(len(results)), format_func=lambda i: describe_variant(results[i].variant), key="sim_pick")
+            if st.button("Use this routine as my template"):
+                st.session_state.profile = apply_variant(profile, results[pick].variant)
+                for key in [k for k in st.session_state if k.startswith(("m_time_", "e_time_"))]:
+                    del st.session_state[key]  # let the Profile page show the new habit times
+                st.session_state.template_tasks = get_calendar().schedule(st.session_state.day_date).tasks
+                if not st.session_state.holiday_mode:
+                    load_template_day()
+                st.session_state.sim_results = None
+                st.session_state.global_message = "Routine applied to your daily template."
+                st.session_state.page = "Dashboard"
+                st.rerun()
+
     if st.button("Back to Dashboard"):
         st.session_state.page = "Dashboard"
+
+# -----------------------
+# Diagnostics page (hidden): per-rerun timings of the hot paths
+# -----------------------
+elif st.session_state.page == "Diagnostics":
+    st.title("🩺 Diagnostics")
+    st.checkbox("Collect timings (for the whole server process)", value=diagnostics.enabled(), key="diag_enabled",
+                on_change=lambda: diagnostics.enable() if st.session_state.diag_enabled else diagnostics.disable())
+
+    stats = diagnostics.summary()
+    if not stats:
+        st.info("No timings yet. Enable collection above (or start the app with PLANNER_DIAGNOSTICS=1) and use the planner for a while.")
+    else:
+        st.subheader("Per call (rolling window)")
+        st.dataframe([
+            {"name": name, "calls": x["calls"], "mean ms": x["mean"] * 1e3, "p50 ms": x["p50"] * 1e3,
+             "p95 ms": x["p95"] * 1e3, "max ms": x["max"] * 1e3, "calls / rerun": x["calls_per_rerun"],
+             "ms / rerun": None if x["seconds_per_rerun"] is None else x["seconds_per_rerun"] * 1e3}
+            for name, x in stats.items()
+        ], hide_index=True)
+
+        runs = diagnostics.recent_runs()
+        if runs:
+            st.subheader("Recent reruns")
+            st.bar_chart({"rerun ms": [r["seconds"] * 1e3 for r in runs]})
+
+        st.subheader("Histogram")
+        name = st.selectbox("Timer", list(stats), key="diag_timer")
+        buckets = diagnostics.histogram(name)
+        counts = [c - (buckets[i - 1][1] if i else 0) for i, (_, c) in enumerate(buckets)]
+        labels = [f"≤ {le * 1e3:g} ms" if le != float("inf") else "more" for le, _ in buckets]
+        st.bar_chart({"calls": dict(zip(labels, counts))})
+
+        # Downloads only: the page is reachable by any visitor, so it never writes server-side files
+        st.subheader("Export")
+        d1, d2 = st.columns(2)
+        d1.download_button("Download JSON", diagnostics.to_json(), file_name="diagnostics.json")
+        d2.download_button("Download Prometheus text", diagnostics.to_prometheus(), file_name="diagnostics.prom")
+        if st.button("Reset timings"):
+            diagnostics.reset()
+            st.rerun()
+
+    if st.button("Back to Dashboard"):
+        st.session_state.page = "Dashboard"
+
+diagnostics.section("persist")
+persist_state()
+sync_reminders()
+diagnostics.end_run()
@@ -0,0 +1,162 @@
+# benchmarks/compact_tasks.py
+"""
+Compact task representations for holding many days of schedules in memory.
+
+Task is a __slots__ object that still behaves like the task dicts used
+everywhere else (task["start_time"], task.get("meta", {}), task.copy()), so
+the existing helpers work on it unchanged. DaySchedule stores a whole day
+column-wise: start/end as minutes since midnight in array('i') buffers and
+interned titles, and hands out Task views on access.
+
+Times are kept at minute resolution; seconds are dropped on conversion.
+
+Kept with the benchmarks rather than in planner/: the day caches (the
+template LRU in templates.py, WeekCalendar, FrozenSchedule) hold task dicts
+that are shared read-only across sessions, and LayeredIndex tracks base
+tasks by identity, which DaySchedule's per-access views would break.
+benchmarks/task_memory.py measures what moving a cache onto them would save.
+"""
+from array import array
+from datetime import datetime, timedelta
+import sys
+
+_KEYS = ("id", "title", "start_time", "end_time", "meta")
+
+
+def to_minutes(dt, day):
+    """Minutes from midnight of `day` to dt (may exceed 1440 for overnight tasks)."""
+    return (dt.toordinal() - day.toordinal()) * 1440 + dt.hour * 60 + dt.minute
+
+
+def from_minutes(minutes, day):
+    return datetime(day.year, day.month, day.day) + timedelta(minutes=minutes)
+
+
+class Task:
+    __slots__ = ("id", "title", "start", "end", "day", "meta")
+
+    def __init__(self, title, start, end, day, id=None, meta=None):
+        self.id = id
+        self.title = sys.intern(title)
+        self.start = start
+        self.end = end
+        self.day = day
+        self.meta = meta
+
+    @classmethod
+    def from_dict(cls, task, day=None):
+        day = day or task["start_time"].date()
+        return cls(task["title"], to_minutes(task["start_time"], day), to_minutes(task["end_time"], day),
+                   day, id=task.get("id"), meta=task.get("meta"))
+
+    def to_dict(self):
+        return {k: self[k] for k in _KEYS if k in self}
+
+    # --- dict-style access, so code written for task dicts keeps working ---
+    def __getitem__(self, key):
+        if key == "start_time":
+            return from_minutes(self.start, self.day)
+        if key == "end_time":
+            return from_minutes(self.end, self.day)
+        if key in ("id", "title", "meta"):
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == "start_time":
+            self.start = to_minutes(value, self.day)
+        elif key == "end_time":
+            self.end = to_minutes(value, self.day)
+        elif key == "title":
+            self.title = sys.intern(value)
+        elif key in ("id", "meta"):
+            setattr(self, key, value)
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return [k for k in _KEYS if k in self]
+
+    def copy(self):
+        return Task(self.title, self.start, self.end, self.day, id=self.id, meta=self.meta)
+
+    def __eq__(self, other):
+        if isinstance(other, Task):
+            return (self.id, self.title, self.start, self.end, self.day, self.meta) == \
+                (other.id, other.title, other.start, other.end, other.day, other.meta)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Task({self.title!r}, {self.start}, {self.end}, id={self.id!r})"
+
+
+class DaySchedule:
+    """
+    Column-wise store of one day's tasks. Iterating or indexing yields Task
+    views; meta dicts are kept sparsely since most tasks have none.
+    """
+    __slots__ = ("day", "starts", "ends", "titles", "ids", "metas")
+
+    def __init__(self, day, tasks=()):
+        self.day = day
+        self.starts = array("i")
+        self.ends = array("i")
+        self.titles = []
+        self.ids = []
+        self.metas = {}
+        self.extend(tasks)
+
+    def append(self, task):
+        """Adds a task dict or Task."""
+        if isinstance(task, Task) and task.day == self.day:
+            start, end = task.start, task.end
+        else:
+            start, end = to_minutes(task["start_time"], self.day), to_minutes(task["end_time"], self.day)
+        i = len(self.titles)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.titles.append(sys.intern(task["title"]))
+        task_id = task.get("id")
+        self.ids.append(sys.intern(task_id) if task_id is not None else None)
+        meta = task.get("meta")
+        if meta:
+            self.metas[i] = meta
+
+    def extend(self, tasks):
+        for t in tasks:
+            self.append(t)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return Task(self.titles[i], self.starts[i], self.ends[i], self.day, id=self.ids[i], meta=self.metas.get(i))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_tasks(self):
+        """Plain task dicts, as used by the Streamlit session."""
+        return [t.to_dict() for t in self]
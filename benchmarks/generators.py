@@ -0,0 +1,71 @@
+# benchmarks/generators.py
+"""
+Synthetic schedules for the benchmarks. Every generator is deterministic for
+a given (n, seed) and returns task dicts shaped like the planner's, sorted
+by start time; the time span grows with n so the density stays the same at
+any size.
+"""
+import random
+from datetime import datetime, timedelta
+
+BASE = datetime(2024, 1, 1, 4, 0)  # start of a planner day
+TITLES = ["Reading", "Meditation", "Jogging/Walking", "Watering plants", "Breakfast", "Dinner",
+          "Work / College", "Light hobbies", "Listening to music", "Drawing/Painting"]
+
+
+def _task(i, title, start, minutes):
+    return {"id": f"t{i:07d}", "title": title, "start_time": start, "end_time": start + timedelta(minutes=minutes)}
+
+
+def dense_day(n, seed=0):
+    """Heavily overlapping tasks: about five running at any moment."""
+    rng = random.Random(seed)
+    tasks = [_task(i, rng.choice(TITLES), BASE + timedelta(minutes=rng.randrange(n * 10)), rng.randrange(15, 91))
+             for i in range(n)]
+    return sorted(tasks, key=lambda t: t["start_time"])
+
+
+def sparse_day(n, seed=0):
+    """Short tasks with gaps between them; almost nothing overlaps."""
+    rng = random.Random(seed)
+    tasks, t = [], BASE
+    for i in range(n):
+        t += timedelta(minutes=rng.randrange(30, 91))
+        tasks.append(_task(i, rng.choice(TITLES), t, rng.randrange(10, 31)))
+    return tasks
+
+
+def night_shifts(n, seed=0):
+    """
+    Days built around a 22:00-06:00 shift that crosses midnight, with short
+    habits before and after it (some of which collide with the shift).
+    """
+    rng = random.Random(seed)
+    tasks, day = [], BASE.replace(hour=0)
+    while len(tasks) < n:
+        i = len(tasks)
+        tasks.append(_task(i, "Work / College", day.replace(hour=22), 8 * 60))
+        for k in range(min(5, n - len(tasks))):
+            hour = rng.choice([6, 7, 8, 18, 19, 20, 21, 23])
+            tasks.append(_task(i + k + 1, rng.choice(TITLES), day + timedelta(hours=hour, minutes=rng.randrange(0, 60, 5)),
+                               rng.randrange(15, 61)))
+        day += timedelta(days=1)
+    return sorted(tasks, key=lambda t: t["start_time"])
+
+
+def duplicate_titles(n, seed=0):
+    """Few distinct titles and many exact repeats (same title and times), as a re-run merge would leave."""
+    rng = random.Random(seed)
+    distinct = max(1, n // 4)
+    slots = [(rng.choice(TITLES[:3]), BASE + timedelta(minutes=rng.randrange(distinct * 20)), rng.choice([20, 30, 45]))
+             for _ in range(distinct)]
+    tasks = [_task(i, *slots[rng.randrange(distinct)]) for i in range(n)]
+    return sorted(tasks, key=lambda t: t["start_time"])
+
+
+GENERATORS = {
+    "dense": dense_day,
+    "sparse": sparse_day,
+    "night": night_shifts,
+    "duplicates": duplicate_titles,
+}
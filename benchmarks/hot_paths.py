@@ -0,0 +1,184 @@
+# benchmarks/hot_paths.py
+"""
+Time and peak memory of the scheduling hot paths over synthetic schedules
+(see benchmarks/generators.py) at 10, 1k, 100k and 1M tasks.
+
+    python -m benchmarks.hot_paths                          # print a table
+    python -m benchmarks.hot_paths --save baseline.json     # record a baseline
+    python -m benchmarks.hot_paths --compare baseline.json  # diff against it
+
+--compare exits with status 1 if any case got slower than --threshold times
+its baseline, so it can gate a CI job. Times are the best of several runs;
+peak memory is measured in a separate run under tracemalloc.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+
+from planner.helpers import detect_conflict, normalize_schedule, shift_after_insert
+from planner.intervals import IntervalIndex
+from planner.schedule import FrozenSchedule, SortedSchedule
+
+from .generators import GENERATORS
+
+SIZES = (10, 1_000, 100_000, 1_000_000)
+INDEX_MAX = 100_000  # building a pure-Python treap of 1M tasks takes minutes
+
+
+def _probe(tasks):
+    """A 45-minute task in the middle of the schedule."""
+    mid = tasks[len(tasks) // 2]["start_time"]
+    return {"id": "probe", "title": "probe", "start_time": mid, "end_time": mid + timedelta(minutes=45)}
+
+
+# -----------------------
+# Cases: setup(tasks) -> zero-argument callable to measure
+# -----------------------
+def case_normalize(tasks):
+    return lambda: normalize_schedule(tasks)
+
+
+def case_conflict_list(tasks):
+    probe = _probe(tasks)
+    return lambda: detect_conflict(tasks, probe)
+
+
+def case_conflict_index(tasks):
+    index, probe = IntervalIndex(tasks), _probe(tasks)
+    return lambda: detect_conflict(index, probe)
+
+
+def case_shift(tasks):
+    day = normalize_schedule(tasks)
+    probe = _probe(day)
+    i = len(day) // 2
+    day.insert(i, probe)
+    return lambda: shift_after_insert(day, i)
+
+
+def case_merge(tasks):
+    """Dashboard merge: manual tasks layered on the shared template, then normalized."""
+    step = max(1, len(tasks) // 20)
+    manual = [dict(t, meta={"manual": True}) for t in tasks[::step]]
+    template = FrozenSchedule(normalize_schedule([t for k, t in enumerate(tasks) if k % step]))
+    completed = [t["id"] for t in template.tasks[::3]]
+
+    def merge():
+        day = SortedSchedule.from_changes(template, added=manual, completed=completed)
+        day.normalize()
+        return day
+    return merge
+
+
+CASES = {
+    "normalize_schedule": (case_normalize, None),
+    "detect_conflict[list]": (case_conflict_list, None),
+    "detect_conflict[index]": (case_conflict_index, INDEX_MAX),
+    "shift_after_insert": (case_shift, None),
+    "merge": (case_merge, INDEX_MAX),
+}
+
+
+# -----------------------
+# Measurement
+# -----------------------
+def best_time(fn, budget=0.5, max_runs=50):
+    """Best wall time of repeated calls, running for about `budget` seconds."""
+    best, spent, runs = float("inf"), 0.0, 0
+    while runs < max_runs and (runs == 0 or spent < budget):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        best, spent, runs = min(best, elapsed), spent + elapsed, runs + 1
+    return best
+
+
+def peak_memory(fn):
+    """Peak bytes allocated during one call (the result included)."""
+    tracemalloc.start()
+    try:
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def run(sizes, scenarios, cases, memory=True):
+    """Yields ("case/scenario/n", {"seconds", "peak_bytes"}) as each measurement finishes."""
+    for scenario in scenarios:
+        for n in sizes:
+            tasks = GENERATORS[scenario](n)
+            for name in cases:
+                setup, max_n = CASES[name]
+                if max_n is not None and n > max_n:
+                    continue
+                fn = setup(tasks)
+                entry = {"seconds": best_time(fn)}
+                if memory:
+                    entry["peak_bytes"] = peak_memory(fn)
+                yield f"{name}/{scenario}/{n}", entry
+            del tasks
+
+
+# -----------------------
+# Reporting
+# -----------------------
+def _row(key, entry, base=None, threshold=None):
+    name, scenario, n = key.split("/")
+    line = f"{name:<24} {scenario:<11} {int(n):>9,} {entry['seconds'] * 1e3:>11.3f}"
+    line += f" {entry['peak_bytes'] / 2**20:>9.2f}" if "peak_bytes" in entry else f" {'-':>9}"
+    if base is not None:
+        ratio = entry["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ("  faster" if ratio < 1 / threshold else "")
+        line += f" {base['seconds'] * 1e3:>11.3f} {ratio:>6.2f}x{flag}"
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.hot_paths", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma-separated task counts")
+    parser.add_argument("--scenarios", default=",".join(GENERATORS), help="comma-separated generators")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated cases")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--save", metavar="PATH", help="write results as baseline JSON")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON to diff against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    header = f"{'case':<24} {'scenario':<11} {'tasks':>9} {'ms':>11} {'peak MB':>9}"
+    if baseline is not None:
+        header += f" {'base ms':>11} {'ratio':>7}"
+    print(header)
+    results, regressions = {}, 0
+    for key, entry in run(sizes, args.scenarios.split(","), args.cases.split(","), memory=not args.no_memory):
+        results[key] = entry
+        base = baseline.get(key) if baseline is not None else None
+        print(_row(key, entry, base, args.threshold), flush=True)
+        if base is not None and entry["seconds"] > base["seconds"] * args.threshold:
+            regressions += 1
+
+    if args.save:
+        meta = {"python": sys.version.split()[0], "platform": platform.platform(), "machine": platform.machine()}
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=1, sort_keys=True)
+        print(f"saved {len(results)} results to {args.save}")
+    if regressions:
+        print(f"{regressions} case(s) slower than {args.threshold}x baseline")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
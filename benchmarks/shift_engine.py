@@ -0,0 +1,48 @@
+# benchmarks/shift_engine.py
+"""
+Microbenchmark for SortedSchedule.insert_and_shift.
+
+Builds a day of `n` tasks where the first `k` are back to back (so an insert
+at the front ripples through exactly k tasks) and the rest are spread out.
+Run from the repo root:
+
+    python -m benchmarks.shift_engine
+"""
+import time
+from datetime import datetime, timedelta
+
+from planner.schedule import SortedSchedule
+
+BASE = datetime(2024, 1, 1)
+
+
+def make_day(n, k):
+    tasks = []
+    t = BASE
+    for i in range(n):
+        if i >= k:
+            t += timedelta(minutes=60)  # gap: the ripple stops here
+        tasks.append({"title": f"task {i}", "start_time": t, "end_time": t + timedelta(minutes=10)})
+        t += timedelta(minutes=10)
+    return tasks
+
+
+def time_insert(n, k):
+    sched = SortedSchedule(make_day(n, k))
+    new_task = {"title": "inserted", "start_time": BASE, "end_time": BASE + timedelta(minutes=5)}
+    t0 = time.perf_counter()
+    moved = sched.insert_and_shift(new_task)
+    elapsed = time.perf_counter() - t0
+    return elapsed, len(moved)
+
+
+def main():
+    print(f"{'n':>8} {'ripple k':>9} {'moved':>7} {'ms':>9} {'us/task':>9}")
+    for n in (10_000, 50_000):
+        for k in (10, 100, 1_000, 10_000):
+            elapsed, moved = time_insert(n, k)
+            print(f"{n:>8} {k:>9} {moved:>7} {elapsed * 1e3:>9.3f} {elapsed * 1e6 / max(moved, 1):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# benchmarks/task_memory.py
+"""
+Memory benchmark: today's list of task dicts holding datetimes vs. a list of
+__slots__ Task objects vs. the columnar DaySchedule.
+
+    python -m benchmarks.task_memory
+"""
+from datetime import date, datetime, timedelta
+import tracemalloc
+
+from .compact_tasks import DaySchedule, Task
+
+DAY = date(2024, 1, 1)
+TITLES = ["Reading", "Meditation", "Jogging/Walking", "Watering plants", "Breakfast", "Dinner", "Drawing/Painting"]
+
+
+def make_dicts(n):
+    base = datetime.combine(DAY, datetime.min.time())
+    tasks = []
+    for i in range(n):
+        start = base + timedelta(minutes=i % 1440)
+        # Titles as they would arrive from a form or a file: equal but not shared
+        title = "".join(TITLES[i % len(TITLES)])
+        tasks.append({"id": f"{i:012x}", "title": title, "start_time": start,
+                      "end_time": start + timedelta(minutes=20)})
+    return tasks
+
+
+def measure(build):
+    tracemalloc.start()
+    obj = build()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def main():
+    print(f"{'tasks':>8} {'layout':<20} {'bytes':>12} {'bytes/task':>11}")
+    for n in (10_000, 100_000):
+        source = make_dicts(n)
+        layouts = [
+            ("dict + datetime", lambda: [dict(t, start_time=t["start_time"] + timedelta(0),
+                                              end_time=t["end_time"] + timedelta(0),
+                                              title="".join(t["title"])) for t in source]),
+            ("Task (__slots__)", lambda: [Task.from_dict(t, DAY) for t in source]),
+            ("DaySchedule", lambda: DaySchedule(DAY, source)),
+        ]
+        for name, build in layouts:
+            size = measure(build)
+            print(f"{n:>8} {name:<20} {size:>12,} {size / n:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
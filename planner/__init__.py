@@ -0,0 +1,24 @@
+# planner/__init__.py
+"""
+Scheduling core of the Life & Career Planner.
+
+Everything here is plain Python (NumPy optional) and never imports
+Streamlit, so it can be used from scripts, cron jobs and the command line
+(`python -m planner`) as well as from the app.
+"""
+from .calendar_engine import WeekCalendar
+from .helpers import (DAY_START, detect_conflict, format_range, normalize_schedule, overlap,
+                      planner_date, seconds_until_change, shift_after_insert, to_dt)
+from .intervals import IntervalIndex, LayeredIndex
+from .schedule import FrozenSchedule, SortedSchedule, freeze_task, new_task_id, thaw_task
+from .storage import MemoryStore, SQLiteStore, StateStore
+from .templates import SHIFT_PRESETS, build_template, profile_fingerprint, shared_template
+from .timeline import Timeline
+
+__all__ = [
+    "DAY_START", "FrozenSchedule", "IntervalIndex", "LayeredIndex", "MemoryStore",
+    "SHIFT_PRESETS", "SQLiteStore", "SortedSchedule", "StateStore", "Timeline", "WeekCalendar",
+    "build_template", "detect_conflict", "format_range", "freeze_task", "new_task_id",
+    "normalize_schedule", "overlap", "planner_date", "profile_fingerprint", "seconds_until_change",
+    "shared_template", "shift_after_insert", "thaw_task", "to_dt",
+]
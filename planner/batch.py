@@ -0,0 +1,139 @@
+# planner/batch.py
+"""
+Batch conflict detection and normalization for bulk task import.
+
+Works on parallel sequences of integer start/end times (minutes, seconds -
+any unit, as long as it is consistent). Uses NumPy when it is installed and
+falls back to plain Python otherwise; the results are the same either way.
+"""
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+from .schedule import new_task_id
+
+
+def _sorted(starts, ends):
+    """Stable sort by start, as sorted() does in normalize_schedule."""
+    if np is not None:
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        order = np.argsort(starts, kind="stable")
+        return order, starts[order], ends[order]
+    order = sorted(range(len(starts)), key=starts.__getitem__)
+    return order, [starts[i] for i in order], [ends[i] for i in order]
+
+
+def normalize_times(starts, ends):
+    """
+    Same result as normalize_schedule in one pass: returns (order, new_starts,
+    new_ends) where order is the sort permutation of the input and the new
+    times are given in that sorted order.
+
+    Each task ends at max(its start, previous end) + its duration. Unrolled,
+    end[i] = C[i] + max over j <= i of (start[j] - C[j-1]) with C the running
+    sum of durations, which is a cumsum plus a maximum.accumulate.
+    """
+    order, s, e = _sorted(starts, ends)
+    if np is not None:
+        dur = e - s
+        csum = np.cumsum(dur)
+        new_ends = csum + np.maximum.accumulate(s - (csum - dur))
+        return order, new_ends - dur, new_ends
+    dur = [b - a for a, b in zip(s, e)]
+    csum = list(accumulate(dur))
+    best = accumulate((a - (c - d) for a, c, d in zip(s, csum, dur)), max)
+    new_ends = [c + m for c, m in zip(csum, best)]
+    return order, [x - d for x, d in zip(new_ends, dur)], new_ends
+
+
+def conflict_mask(starts, ends):
+    """
+    Flags, per input task, whether it overlaps any other task in the batch.
+    Sorted sweep: a task overlaps something earlier iff the running max of
+    earlier end times passes its start, and something later iff the next
+    start comes before its end. Assumes positive durations, as every task
+    in the planner has.
+    """
+    n = len(starts)
+    order, s, e = _sorted(starts, ends)
+    if np is not None:
+        mask = np.zeros(n, dtype=bool)
+        if n > 1:
+            run_max = np.maximum.accumulate(e)
+            hit = np.zeros(n, dtype=bool)
+            hit[1:] = run_max[:-1] > s[1:]
+            hit[:-1] |= s[1:] < e[:-1]
+            mask[order] = hit
+        return mask
+    mask = [False] * n
+    run_max = None
+    for k in range(n):
+        if run_max is not None and run_max > s[k]:
+            mask[order[k]] = True
+        if k + 1 < n and s[k + 1] < e[k]:
+            mask[order[k]] = True
+        run_max = e[k] if run_max is None else max(run_max, e[k])
+    return mask
+
+
+def conflict_pairs(starts, ends):
+    """
+    All overlapping pairs (i, j) of input positions, i before j in start
+    order. O(n log n + k) for k pairs: after sorting, the partners of task i
+    are the run of later tasks whose start falls before its end.
+    """
+    order, s, e = _sorted(starts, ends)
+    n = len(s)
+    if np is not None:
+        if n < 2:
+            return np.empty((0, 2), dtype=np.int64)
+        stop = np.searchsorted(s, e, side="left")
+        counts = np.maximum(stop - np.arange(1, n + 1), 0)
+        first = np.repeat(np.arange(n), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = first + 1 + offsets
+        keep = s[first] < e[second]  # zero-length tasks touching a start don't overlap
+        return np.column_stack((order[first[keep]], order[second[keep]]))
+    pairs = []
+    for i in range(n):
+        j = i + 1
+        while j < n and s[j] < e[i]:
+            if s[i] < e[j]:
+                pairs.append((order[i], order[j]))
+            j += 1
+    return pairs
+
+
+_TICK = timedelta(microseconds=1)
+
+
+def normalize_tasks(tasks):
+    """
+    Vectorized normalize_schedule for a batch of task dicts (or Tasks):
+    returns sorted, non-overlapping copies, with IDs added where missing.
+    Times are handled as integer microseconds, so the result matches
+    normalize_schedule exactly.
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return []
+    origin = datetime.combine(min(t["start_time"] for t in tasks).date(), datetime.min.time())
+    starts = [(t["start_time"] - origin) // _TICK for t in tasks]
+    ends = [(t["end_time"] - origin) // _TICK for t in tasks]
+    order, new_starts, new_ends = normalize_times(starts, ends)
+    out = []
+    for k, i in enumerate(order):
+        i = int(i)
+        t = tasks[i].copy()
+        if "id" not in t:
+            t["id"] = new_task_id()
+        if int(new_starts[k]) != starts[i]:
+            t["start_time"] = origin + int(new_starts[k]) * _TICK
+            t["end_time"] = origin + int(new_ends[k]) * _TICK
+        out.append(t)
+    return out
@@ -0,0 +1,69 @@
+# planner/calendar_engine.py
+"""
+Multi-day view of a profile's routine.
+
+The template is held once (as the profile it is built from); a concrete
+day is only materialized when it is asked for, and then cached per date.
+Days are the shared, read-only FrozenSchedules from templates, so the cache
+holds references rather than copies. Days can be overridden (e.g. a holiday
+or an edited day) without touching the template.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from .helpers import DAY_START
+from .schedule import FrozenSchedule
+from .templates import shared_template
+
+_EMPTY = FrozenSchedule(())
+
+
+class WeekCalendar:
+    def __init__(self, profile, cache_days=31):
+        self.profile = profile
+        self.cache_days = cache_days
+        self._days = OrderedDict()   # date -> FrozenSchedule, least recently used first
+        self._overrides = {}         # date -> FrozenSchedule
+
+    def schedule(self, d):
+        """The FrozenSchedule for planner day d, built on first use."""
+        if d in self._overrides:
+            return self._overrides[d]
+        if d in self._days:
+            self._days.move_to_end(d)
+            return self._days[d]
+        sched = shared_template(self.profile, d) if self.profile else _EMPTY
+        self._days[d] = sched
+        if len(self._days) > self.cache_days:
+            self._days.popitem(last=False)
+        return sched
+
+    def day(self, d):
+        """The tasks for planner day d (read-only mappings)."""
+        return list(self.schedule(d))
+
+    def set_day(self, d, tasks):
+        """Overrides one date's schedule (e.g. a holiday); None restores the template."""
+        if tasks is None:
+            self._overrides.pop(d, None)
+        else:
+            self._overrides[d] = FrozenSchedule(tasks)
+
+    def spillover(self, d):
+        """
+        Tasks from the previous day that run past the start of day d, e.g. a
+        22:00-06:00 shift. IDs are prefixed with that date so they don't clash
+        with the same template task on day d.
+        """
+        prev = d - timedelta(days=1)
+        start = datetime.combine(d, DAY_START)
+        return [dict(t, id=f"{prev.isoformat()}:{t['id']}") for t in self.day(prev) if t["end_time"] > start]
+
+    def week(self, start, days=7):
+        """Yields (date, tasks) for consecutive days; nothing is built until it is iterated."""
+        for i in range(days):
+            d = start + timedelta(days=i)
+            yield d, self.day(d)
+
+    def cached_dates(self):
+        return list(self._days)
@@ -0,0 +1,317 @@
+# planner/cli.py
+"""
+Command line front end for batch use (no Streamlit involved).
+
+    python -m planner plan profiles.json --date 2026-10-17 --days 7 -o plans.csv
+    python -m planner validate schedules.csv --fix -o fixed.json
+    python -m planner validate work.ics --fix -o fixed.ics
+    python -m planner history planner-events --user alice --since 2026-09-01
+    python -m planner simulate profile.json --offsets=-30,0,30 --top 10 -o variants.csv
+
+Profiles are read from JSON (one object or a list) or CSV (one profile per
+row, habits written as "Reading@06:00;Meditation@06:45"); JSON profiles may
+carry recurring "rules" as on the Profile page. Schedules are read
+from JSON (a task list, or a list of {"name", "date", "tasks"} as written by
+`plan`) or CSV (title,start_time,end_time, grouped by name/date columns when
+present) or iCalendar (one schedule per planner day). Times are "HH:MM"
+or ISO datetimes. Output format follows the extension of -o (.json, .csv
+or .ics; stdout defaults to JSON).
+"""
+import argparse
+import csv
+from datetime import date, datetime, time, timedelta, timezone
+from itertools import groupby
+import json
+import os
+import sys
+
+from .helpers import planner_date
+from .interchange import ICS_FOOTER, TASK_FIELDS, ics_event, ics_header, ics_tasks, parse_when, read_lines
+from .recurrence import rule_from, rule_record
+from .templates import SHIFT_PRESETS, shared_template
+
+# Same defaults as the profile page in the app
+PROFILE_DEFAULTS = {
+    "shift_type": "Day shift (9–17)",
+    "wake_time": time(6, 0),
+    "sleep_time": time(23, 0),
+    "breakfast_time": time(8, 0),
+    "dinner_time": time(19, 0),
+}
+EVENING_DEFAULT = time(19, 0)
+_TICK = timedelta(microseconds=1)
+
+
+# -----------------------
+# Input
+# -----------------------
+def _time(value):
+    return value if isinstance(value, time) else time.fromisoformat(value)
+
+
+def _habits(value):
+    """CSV habit cell "Reading@06:00;Meditation" -> ([habits], {habit: time})."""
+    habits, times = [], {}
+    for item in filter(None, (x.strip() for x in (value or "").split(";"))):
+        habit, _, at = item.partition("@")
+        habits.append(habit.strip())
+        if at:
+            times[habit.strip()] = _time(at.strip())
+    return habits, times
+
+
+def profile_from_record(record):
+    """Builds an app-style profile dict from a JSON object or CSV row, filling in the page defaults."""
+    profile = {**PROFILE_DEFAULTS, **{k: v for k, v in record.items() if v not in (None, "")}}
+    for key in ("wake_time", "sleep_time", "breakfast_time", "dinner_time"):
+        profile[key] = _time(profile[key])
+    preset = SHIFT_PRESETS.get(profile["shift_type"], SHIFT_PRESETS[PROFILE_DEFAULTS["shift_type"]])
+    profile["work_start"] = _time(profile.get("work_start", preset[0]))
+    profile["work_end"] = _time(profile.get("work_end", preset[1]))
+    for part, default in (("morning", profile["wake_time"]), ("evening", EVENING_DEFAULT)):
+        habits, times = profile.get(f"{part}_habits", []), dict(profile.get(f"{part}_times", {}))
+        if isinstance(habits, str):
+            habits, parsed = _habits(habits)
+            times.update(parsed)
+        profile[f"{part}_habits"] = list(habits)
+        profile[f"{part}_times"] = {h: _time(times.get(h, default)) for h in habits}
+    profile["rules"] = [rule_record(rule_from(r)) for r in profile.get("rules", [])]
+    return profile
+
+
+def read_records(path):
+    """Yields dicts from a JSON file (object or list) or a CSV file; "-" reads JSON from stdin."""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+        return
+    if path == "-":
+        data = json.load(sys.stdin)
+    else:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    yield from (data if isinstance(data, list) else [data])
+
+
+def read_schedules(path, day=None):
+    """Yields (name, date, tasks) for each schedule in a JSON, CSV or iCalendar file."""
+    if path.endswith(".ics"):
+        days = {}  # (profile, date) -> tasks; one calendar may hold several profiles (see plan)
+        for t in ics_tasks(read_lines(path)):
+            days.setdefault((t["meta"].get("profile", ""), planner_date(t["start_time"])), []).append(t)
+        for name, d in sorted(days):
+            yield name, d, days[name, d]
+        return
+    records = read_records(path)
+    if path.endswith(".csv"):
+        key = lambda r: (r.get("name", ""), r.get("date", ""))
+        for (name, d), rows in groupby(records, key=key):
+            d = date.fromisoformat(d) if d else day
+            yield name, d, [_task(r, i, d) for i, r in enumerate(rows)]
+        return
+    records = list(records)
+    if records and "tasks" not in records[0]:
+        records = [{"tasks": records}]  # a bare task list
+    for rec in records:
+        d = date.fromisoformat(rec["date"]) if rec.get("date") else day
+        yield rec.get("name", ""), d, [_task(t, i, d) for i, t in enumerate(rec["tasks"])]
+
+
+def _task(record, n, day):
+    return {"id": record.get("id") or f"row{n}", "title": record.get("title", ""),
+            "start_time": parse_when(record["start_time"], day), "end_time": parse_when(record["end_time"], day)}
+
+
+# -----------------------
+# Output
+# -----------------------
+class _Writer:
+    """Streams schedules out as CSV rows, iCalendar events or a JSON list, one schedule at a time."""
+
+    def __init__(self, path):
+        self.csv = bool(path) and path.endswith(".csv")
+        self.ics = bool(path) and path.endswith(".ics")
+        self._file = open(path, "w", newline="", encoding="utf-8") if path else sys.stdout
+        self._count = 0
+        if self.csv:
+            self._rows = csv.DictWriter(self._file, fieldnames=TASK_FIELDS)
+            self._rows.writeheader()
+        elif self.ics:
+            self._stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            self._file.write(ics_header())
+        else:
+            self._file.write("[")
+
+    def write(self, name, day, tasks):
+        if self.ics:
+            self._file.write("".join(ics_event(day, t, self._stamp, name) for t in tasks))
+        elif self.csv:
+            for t in tasks:
+                self._rows.writerow({"name": name, "date": day.isoformat() if day else "", "id": t["id"],
+                                     "title": t["title"], "start_time": t["start_time"].isoformat(),
+                                     "end_time": t["end_time"].isoformat()})
+        else:
+            record = {"name": name, "date": day.isoformat() if day else None,
+                      "tasks": [{"id": t["id"], "title": t["title"], "start_time": t["start_time"].isoformat(),
+                                 "end_time": t["end_time"].isoformat()} for t in tasks]}
+            self._file.write(("," if self._count else "") + "\n" + json.dumps(record, ensure_ascii=False))
+        self._count += 1
+
+    def close(self):
+        if self.ics:
+            self._file.write(ICS_FOOTER)
+        elif not self.csv:
+            self._file.write("\n]\n")
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+# -----------------------
+# Commands
+# -----------------------
+def plan(args):
+    """Writes each profile's template schedule for --days days from --date."""
+    start = args.date or planner_date()
+    out = _Writer(args.output)
+    try:
+        for n, record in enumerate(read_records(args.profiles)):
+            profile = profile_from_record(record)
+            name = profile.get("name") or f"profile{n + 1}"
+            for i in range(args.days):
+                d = start + timedelta(days=i)
+                out.write(name, d, shared_template(profile, d))
+    finally:
+        out.close()
+    return 0
+
+
+def validate(args):
+    """Reports overlapping tasks per schedule; --fix writes normalized schedules instead of failing."""
+    from .batch import conflict_pairs, normalize_tasks  # pulls in NumPy when available
+
+    out = _Writer(args.output) if args.fix else None
+    bad = 0
+    try:
+        for name, d, tasks in read_schedules(args.schedules, args.date):
+            origin = min((t["start_time"] for t in tasks), default=None)
+            starts = [(t["start_time"] - origin) // _TICK for t in tasks]
+            ends = [(t["end_time"] - origin) // _TICK for t in tasks]
+            pairs = [(int(i), int(j)) for i, j in conflict_pairs(starts, ends)]
+            label = " ".join(x for x in (name, d.isoformat() if d else "") if x) or "schedule"
+            if pairs:
+                bad += 1
+                print(f"{label}: {len(pairs)} conflict(s)", file=sys.stderr)
+                for i, j in pairs[:args.show]:
+                    print(f"  {tasks[i]['title']!r} overlaps {tasks[j]['title']!r}", file=sys.stderr)
+            if out is not None:
+                out.write(name, d, normalize_tasks(tasks) if pairs else sorted(tasks, key=lambda t: t["start_time"]))
+    finally:
+        if out is not None:
+            out.close()
+    return 1 if bad and not args.fix else 0
+
+
+def history(args):
+    """Prints completion rate and drift per task title from an event log directory."""
+    from .events import EventLog, habit_stats
+
+    if not os.path.isdir(args.events):
+        print(f"no event log at {args.events}", file=sys.stderr)
+        return 1
+    stats = habit_stats(EventLog(args.events), users=args.user, since=args.since)
+    if args.json:
+        json.dump(stats, sys.stdout, indent=1, ensure_ascii=False)
+        print()
+        return 0
+    print(f"{'task':<24} {'days':>6} {'done':>6} {'rate':>6} {'drift min':>10}")
+    for title, x in stats.items():
+        drift = "-" if x["mean_drift"] is None else f"{x['mean_drift']:+.1f}"
+        print(f"{title[:24]:<24} {x['days']:>6} {x['completed']:>6} {x['rate']:>6.0%} {drift:>10}")
+    return 0
+
+
+def simulate(args):
+    """Scores variants of the first profile (shifts x habit orders x offsets) and prints the best."""
+    import heapq
+    from .simulate import count_variants, describe_variant, rank_key, simulate as run, variants
+
+    profile = profile_from_record(next(iter(read_records(args.profile))))
+    offsets = [int(x) for x in args.offsets.split(",")]
+    total = count_variants(profile, args.shift, not args.no_orders, offsets)
+    if args.limit:
+        total = min(total, args.limit)
+    print(f"scoring {total} variant(s)", file=sys.stderr)
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else None
+    rows = csv.writer(out) if out else None
+    if rows:
+        rows.writerow(["routine", "conflicts", "drift_minutes", "free_minutes"])
+    best = []
+    try:
+        found = run(profile, variants(profile, args.shift, not args.no_orders, offsets, args.limit),
+                    args.date or planner_date(), workers=args.workers)
+        for n, result in enumerate(found, 1):
+            if rows:
+                rows.writerow([describe_variant(result.variant), result.conflicts, result.drift, result.free])
+            # Keep only the top N (heap of negated keys, so the worst kept result is on top)
+            entry = (tuple(-k for k in rank_key(result)), n, result)
+            if len(best) < args.top:
+                heapq.heappush(best, entry)
+            else:
+                heapq.heappushpop(best, entry)
+    finally:
+        if out:
+            out.close()
+    print(f"{'conflicts':>9} {'drift min':>9} {'free min':>8}  routine")
+    for _, _, r in sorted(best, key=lambda e: rank_key(e[2])):
+        print(f"{r.conflicts:>9} {r.drift:>9} {r.free:>8}  {describe_variant(r.variant)}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="planner", description="Plan and validate daily schedules in batch.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("plan", help="build template schedules from profiles")
+    p.add_argument("profiles", help="JSON or CSV file of profiles (- for JSON on stdin)")
+    p.add_argument("--date", type=date.fromisoformat, help="first day (default: today)")
+    p.add_argument("--days", type=int, default=1, help="number of days to plan")
+    p.add_argument("-o", "--output", help="output file (.json, .csv or .ics); default JSON on stdout")
+    p.set_defaults(func=plan)
+
+    v = sub.add_parser("validate", help="check schedules for overlapping tasks")
+    v.add_argument("schedules", help="JSON, CSV or iCalendar file of schedules (- for JSON on stdin)")
+    v.add_argument("--date", type=date.fromisoformat, help="date for HH:MM times without one")
+    v.add_argument("--fix", action="store_true", help="write normalized schedules instead of failing")
+    v.add_argument("--show", type=int, default=5, help="conflicts to list per schedule")
+    v.add_argument("-o", "--output", help="output file for --fix (.json, .csv or .ics); default JSON on stdout")
+    v.set_defaults(func=validate)
+
+    h = sub.add_parser("history", help="completion rate and drift per task from the app's event log")
+    h.add_argument("events", help="event log directory (PLANNER_EVENTS of the app)")
+    h.add_argument("--user", action="append", help="only this user (repeatable); default all")
+    h.add_argument("--since", type=date.fromisoformat, help="first day to include")
+    h.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    h.set_defaults(func=history)
+
+    w = sub.add_parser("simulate", help="compare alternative routines for a profile")
+    w.add_argument("profile", help="JSON or CSV file of profiles (the first one is used)")
+    w.add_argument("--date", type=date.fromisoformat, help="day to simulate (default: today)")
+    w.add_argument("--shift", action="append", help="shift preset name or 'Current' (repeatable); default all")
+    w.add_argument("--offsets", default="0", help="comma-separated habit time offsets in minutes, e.g. --offsets=-30,0,30")
+    w.add_argument("--no-orders", action="store_true", help="keep the habit order as it is")
+    w.add_argument("--limit", type=int, help="score at most this many variants")
+    w.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    w.add_argument("--top", type=int, default=10, help="best routines to print")
+    w.add_argument("-o", "--output", help="CSV file for every scored variant, written as results arrive")
+    w.set_defaults(func=simulate)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyError as e:
+        print(f"planner: missing field {e}", file=sys.stderr)
+        return 2
+    except (ValueError, OSError) as e:
+        # Bad input (an unparsable time, an unreadable file): a message, not a traceback
+        print(f"planner: {e}", file=sys.stderr)
+        return 2
@@ -0,0 +1,229 @@
+# planner/diagnostics.py
+"""
+Opt-in timing of the scheduling hot paths and of each app rerun.
+
+Functions decorated with @timed and blocks wrapped in span() record their
+wall time under a name; the app brackets each rerun with begin_run() /
+end_run() and names the page it renders with section(). Samples go into a
+rolling window per name (the last WINDOW calls or reruns), which can be
+summarised, exported as JSON or in the Prometheus text format.
+
+Collection is off unless PLANNER_DIAGNOSTICS=1 is set or enable() is
+called. While off, a timed function costs one global check per call and
+span() hands back a shared no-op context manager.
+"""
+from bisect import bisect_right
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+import json
+import os
+import threading
+import time
+
+WINDOW = 1000
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = os.environ.get("PLANNER_DIAGNOSTICS", "") not in ("", "0")
+_lock = threading.Lock()
+_samples = {}   # name -> deque of durations (seconds)
+_calls = {}     # name -> calls since start / reset
+_runs = deque(maxlen=WINDOW)  # per rerun: {"seconds", "section", "spans": {name: [count, seconds]}}
+_local = threading.local()    # the rerun in progress on this thread
+_NOOP = nullcontext()
+
+
+def enabled():
+    return _enabled
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _calls.clear()
+        _runs.clear()
+
+
+# -----------------------
+# Recording
+# -----------------------
+def record(name, seconds):
+    """Adds one sample under `name` (and to the current rerun's totals)."""
+    with _lock:
+        window = _samples.get(name)
+        if window is None:
+            window = _samples[name] = deque(maxlen=WINDOW)
+        window.append(seconds)
+        _calls[name] = _calls.get(name, 0) + 1
+    run = getattr(_local, "run", None)
+    if run is not None:
+        totals = run["spans"].setdefault(name, [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def span(name):
+    """Context manager timing a block under `name`."""
+    return _Span(name) if _enabled else _NOOP
+
+
+def timed(fn=None, *, name=None):
+    """Decorator timing every call of a function; usable bare or as @timed(name=...)."""
+    if fn is None:
+        return lambda f: timed(f, name=name)
+    label = name or fn.__qualname__
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            record(label, time.perf_counter() - start)
+    return wrapper
+
+
+# -----------------------
+# Reruns
+# -----------------------
+def begin_run():
+    """Starts timing a rerun on this thread (a run that never ends, e.g. after st.rerun, is dropped)."""
+    if not _enabled:
+        _local.run = None
+        return
+    now = time.perf_counter()
+    _local.run = {"start": now, "section": None, "section_start": now, "spans": {}}
+
+
+def section(name):
+    """Names the part of the rerun that starts here; it runs until the next section or end_run()."""
+    run = getattr(_local, "run", None)
+    if run is None:
+        return
+    _close_section(run, time.perf_counter())
+    run["section"] = name
+
+
+def end_run():
+    run = getattr(_local, "run", None)
+    if run is None:
+        return
+    now = time.perf_counter()
+    _close_section(run, now)
+    _local.run = None
+    seconds = now - run["start"]
+    with _lock:
+        _runs.append({"seconds": seconds, "section": run["section"], "spans": run["spans"]})
+    record("rerun", seconds)
+
+
+def _close_section(run, now):
+    if run["section"] is not None:
+        record(run["section"], now - run["section_start"])
+    run["section_start"] = now
+
+
+# -----------------------
+# Reporting
+# -----------------------
+def _snapshot():
+    with _lock:
+        return {name: sorted(window) for name, window in _samples.items()}, dict(_calls), list(_runs)
+
+
+def _quantile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _buckets(ordered):
+    return [(le, bisect_right(ordered, le)) for le in BUCKETS] + [(float("inf"), len(ordered))]
+
+
+def summary():
+    """Per name: calls (total), window size, mean/p50/p95/max seconds and mean calls/seconds per rerun."""
+    samples, calls, runs = _snapshot()
+    out = {}
+    for name, ordered in sorted(samples.items()):
+        per_run = [r["spans"].get(name, (0, 0.0)) for r in runs]
+        out[name] = {
+            "calls": calls[name],
+            "window": len(ordered),
+            "mean": sum(ordered) / len(ordered),
+            "p50": _quantile(ordered, 0.5),
+            "p95": _quantile(ordered, 0.95),
+            "max": ordered[-1],
+            "calls_per_rerun": sum(c for c, _ in per_run) / len(runs) if runs else None,
+            "seconds_per_rerun": sum(s for _, s in per_run) / len(runs) if runs else None,
+        }
+    return out
+
+
+def recent_runs(n=100):
+    """The last n reruns, oldest first."""
+    with _lock:
+        return list(_runs)[-n:]
+
+
+def histogram(name):
+    """Cumulative bucket counts [(le, count), ...] over the window for `name`, ending with +Inf."""
+    with _lock:
+        ordered = sorted(_samples.get(name, ()))
+    return _buckets(ordered)
+
+
+def to_json():
+    return json.dumps({"summary": summary(), "runs": recent_runs(), "buckets": list(BUCKETS)}, indent=1)
+
+
+def to_prometheus():
+    """Prometheus text format; histograms cover the rolling window, the counter all calls."""
+    samples, calls, _ = _snapshot()
+    hist = ["# HELP planner_span_seconds Wall time of instrumented calls (rolling window).",
+            "# TYPE planner_span_seconds histogram"]
+    total = ["# HELP planner_calls_total Instrumented calls since start.",
+             "# TYPE planner_calls_total counter"]
+    for name, ordered in sorted(samples.items()):
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        for le, count in _buckets(ordered):
+            bound = "+Inf" if le == float("inf") else repr(le)
+            hist.append(f'planner_span_seconds_bucket{{name="{label}",le="{bound}"}} {count}')
+        hist.append(f'planner_span_seconds_sum{{name="{label}"}} {sum(ordered)}')
+        hist.append(f'planner_span_seconds_count{{name="{label}"}} {len(ordered)}')
+        total.append(f'planner_calls_total{{name="{label}"}} {calls[name]}')
+    return "\n".join(hist + total) + "\n"
+
+
+def export(path):
+    """Writes the current data to `path`: JSON for .json, Prometheus text otherwise."""
+    text = to_json() if path.endswith(".json") else to_prometheus()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
@@ -0,0 +1,276 @@
+# planner/events.py
+"""
+Append-only history of what happened to each user's day schedule.
+
+Every add, shift, complete and uncomplete is appended as one JSON line to
+the user's file in the log directory; a snapshot line (the whole day:
+tasks and completed IDs) is written whenever the schedule is replaced
+wholesale and every `snapshot_every` events. A day is rebuilt by finding
+its last snapshot (reading the file backwards) and replaying the events
+after it, so replay cost doesn't grow with the length of the history.
+
+    {"day":"2026-10-17","kind":"complete","at":"2026-10-17T07:31:02","id":"morning:Reading"}
+
+HabitStats folds a stream of records into per-title completion rates and
+drift from the preferred start time, keeping only the days still open
+(one per user) in memory, so months of history stream through in
+constant space.
+"""
+from datetime import datetime
+import json
+import os
+import threading
+from urllib.parse import quote, unquote
+
+from .schedule import SortedSchedule
+
+SUFFIX = ".jsonl"
+_BLOCK = 1 << 16
+
+
+# -----------------------
+# Record encoding
+# -----------------------
+def _task_record(task):
+    """Compact JSON-ready copy of a task: times as ISO strings, only the meta the history needs."""
+    meta = task.get("meta", {})
+    rec = {"id": task["id"], "title": task["title"],
+           "start": task["start_time"].isoformat(), "end": task["end_time"].isoformat()}
+    if "preferred" in meta:
+        rec["preferred"] = meta["preferred"].isoformat()
+    for flag in ("manual", "fixed"):
+        if meta.get(flag):
+            rec[flag] = True
+    return rec
+
+
+def _task_from(rec):
+    meta = {flag: True for flag in ("manual", "fixed") if rec.get(flag)}
+    if "preferred" in rec:
+        meta["preferred"] = datetime.fromisoformat(rec["preferred"])
+    task = {"id": rec["id"], "title": rec["title"],
+            "start_time": datetime.fromisoformat(rec["start"]), "end_time": datetime.fromisoformat(rec["end"])}
+    if meta:
+        task["meta"] = meta
+    return task
+
+
+def _parse(line):
+    """A record, or None for a blank or torn (partially written) line."""
+    try:
+        rec = json.loads(line)
+    except ValueError:
+        return None
+    return rec if isinstance(rec, dict) and "kind" in rec else None
+
+
+# -----------------------
+# Replaying a day
+# -----------------------
+class DayState:
+    """One day's tasks and completions as a fold over its records."""
+
+    __slots__ = ("tasks", "done")
+
+    def __init__(self):
+        self.tasks = {}  # id -> task record
+        self.done = set()
+
+    def apply(self, rec):
+        kind = rec["kind"]
+        if kind == "snapshot":
+            self.tasks = {t["id"]: t for t in rec["tasks"]}
+            self.done = set(rec["completed"])
+        elif kind == "add":
+            self.tasks[rec["task"]["id"]] = rec["task"]
+        elif kind == "shift":
+            old = self.tasks.get(rec["id"])
+            if old is not None:
+                # A task moved out of the way keeps where it wanted to be
+                self.tasks[rec["id"]] = {**old, "start": rec["start"], "end": rec["end"],
+                                         "preferred": old.get("preferred", old["start"])}
+        elif kind == "remove":
+            self.tasks.pop(rec["id"], None)
+            self.done.discard(rec["id"])
+        elif kind == "complete":
+            if rec["id"] in self.tasks:
+                self.done.add(rec["id"])
+        elif kind == "uncomplete":
+            self.done.discard(rec["id"])
+
+    def schedule(self):
+        return SortedSchedule([_task_from(t) for t in self.tasks.values()], completed=self.done)
+
+
+def _reversed_lines(f):
+    """Yields (offset, line) of a binary file from the last line to the first."""
+    end = f.seek(0, os.SEEK_END)
+    tail = b""
+    while end > 0:
+        start = max(0, end - _BLOCK)
+        f.seek(start)
+        lines = (f.read(end - start) + tail).split(b"\n")
+        tail = lines.pop(0) if start else b""  # may continue in the previous block
+        pos = start + len(tail) + (1 if start else 0) + sum(len(line) + 1 for line in lines)
+        for line in reversed(lines):
+            pos -= len(line) + 1
+            if line.strip():
+                yield pos, line
+        end = start
+
+
+# -----------------------
+# Log
+# -----------------------
+class EventLog:
+    """
+    One append-only JSON-lines file per user under `directory`. Appends are
+    single small writes in append mode, so several server processes can
+    share a directory.
+    """
+
+    def __init__(self, directory, snapshot_every=200):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self._since_snapshot = {}  # user -> events appended since their last snapshot
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, user):
+        return os.path.join(self.directory, quote(user, safe="") + SUFFIX)
+
+    def users(self):
+        return sorted(unquote(name[:-len(SUFFIX)]) for name in os.listdir(self.directory) if name.endswith(SUFFIX))
+
+    def _write(self, user, rec):
+        line = json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock, open(self.path(user), "a", encoding="utf-8") as f:
+            f.write(line)
+
+    # --- writing ---
+    def append(self, user, day, kind, **fields):
+        """
+        Appends one event for planner day `day`; task dicts go in `task=`.
+        Returns True once `snapshot_every` events have been written since the
+        user's last snapshot, i.e. when the caller should snapshot().
+        """
+        rec = {"day": day.isoformat(), "kind": kind, "at": datetime.now().isoformat(timespec="seconds")}
+        for key, value in fields.items():
+            rec[key] = _task_record(value) if key == "task" else (
+                value.isoformat() if isinstance(value, datetime) else value)
+        self._write(user, rec)
+        with self._lock:
+            count = self._since_snapshot[user] = self._since_snapshot.get(user, 0) + 1
+        return count >= self.snapshot_every
+
+    def snapshot(self, user, day, schedule):
+        """Records the whole day (tasks and completed IDs) so replay can start here."""
+        self._write(user, {"day": day.isoformat(), "kind": "snapshot", "at": datetime.now().isoformat(timespec="seconds"),
+                           "tasks": [_task_record(t) for t in schedule],
+                           "completed": sorted(schedule.completed)})
+        with self._lock:
+            self._since_snapshot[user] = 0
+
+    # --- reading ---
+    def records(self, user, since=None):
+        """Streams the user's records in order, optionally only for days on or after `since`."""
+        try:
+            f = open(self.path(user), "rb")
+        except FileNotFoundError:
+            return
+        first = since.isoformat() if since else None
+        with f:
+            for line in f:
+                rec = _parse(line)
+                if rec is not None and (first is None or rec["day"] >= first):
+                    yield rec
+
+    def replay(self, user, day):
+        """
+        Rebuilds the user's schedule for `day` from its last snapshot and the
+        events after it; None when the log has no snapshot of that day.
+        """
+        key = day.isoformat()
+        try:
+            f = open(self.path(user), "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            offset = None
+            for pos, line in _reversed_lines(f):
+                if b'"kind":"snapshot"' not in line:
+                    continue
+                rec = _parse(line)
+                if rec is not None and rec["day"] == key:
+                    offset = pos
+                    break
+            if offset is None:
+                return None
+            f.seek(offset)
+            state = DayState()
+            for line in f:
+                rec = _parse(line)
+                if rec is not None and rec["day"] == key:
+                    state.apply(rec)
+        return state.schedule()
+
+
+# -----------------------
+# Streaming aggregation
+# -----------------------
+class HabitStats:
+    """
+    Per task title: days scheduled, days completed and drift (minutes the
+    task started after its preferred time; negative when earlier).
+
+    Feed records with add(user, rec) in log order, then read result(). A
+    day is counted, as it stood at its last record, once a record for a
+    later day of the same user arrives (or at result()).
+    """
+
+    def __init__(self):
+        self._open = {}   # user -> (day, DayState)
+        self._titles = {}  # title -> [scheduled, completed, drift count, drift sum, abs drift sum]
+
+    def add(self, user, rec):
+        current = self._open.get(user)
+        if current is None or rec["day"] > current[0]:
+            if current is not None:
+                self._close(current[1])
+            current = self._open[user] = (rec["day"], DayState())
+        elif rec["day"] < current[0]:
+            return  # a late edit to a day already counted
+        current[1].apply(rec)
+
+    def feed(self, log, users=None, since=None):
+        """Adds every record of the given users (default: all) from an EventLog."""
+        for user in users or log.users():
+            for rec in log.records(user, since):
+                self.add(user, rec)
+        return self
+
+    def _close(self, state):
+        for task_id, t in state.tasks.items():
+            row = self._titles.setdefault(t["title"], [0, 0, 0, 0.0, 0.0])
+            row[0] += 1
+            row[1] += task_id in state.done
+            if "preferred" in t:
+                drift = (datetime.fromisoformat(t["start"]) - datetime.fromisoformat(t["preferred"])).total_seconds() / 60
+                row[2] += 1
+                row[3] += drift
+                row[4] += abs(drift)
+
+    def result(self):
+        """{title: {"days", "completed", "rate", "mean_drift", "mean_abs_drift"}}, most scheduled first."""
+        for _, state in self._open.values():
+            self._close(state)
+        self._open.clear()
+        rows = sorted(self._titles.items(), key=lambda kv: (-kv[1][0], kv[0]))
+        return {title: {"days": days, "completed": done, "rate": done / days,
+                        "mean_drift": dsum / n if n else None, "mean_abs_drift": asum / n if n else None}
+                for title, (days, done, n, dsum, asum) in rows}
+
+
+def habit_stats(log, users=None, since=None):
+    """HabitStats over an EventLog, as returned by HabitStats.result()."""
+    return HabitStats().feed(log, users, since).result()
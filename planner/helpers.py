@@ -0,0 +1,120 @@
+# planner/helpers.py
+"""Scheduling helpers shared by the app and the template builder."""
+from datetime import datetime, date, time, timedelta
+
+from .diagnostics import timed
+from .intervals import IntervalIndex
+from .schedule import new_task_id
+
+
+# The planner's day runs from 04:00 to 04:00, so a 01:00 task belongs to the
+# evening before it rather than the morning.
+DAY_START = time(4, 0)
+
+def planner_date(now: datetime = None):
+    """The planner day a moment falls in (before DAY_START it is still the previous day)."""
+    now = now or datetime.now()
+    return now.date() - timedelta(days=1) if now.time() < DAY_START else now.date()
+
+def to_dt(t: time, base_date: date = None, day_start: time = DAY_START):
+    """
+    Convert a time to a datetime on the planner day base_date (the current one if omitted).
+    Times before day_start are in the small hours, i.e. on the next calendar date.
+    """
+    base_date = base_date or planner_date()
+    dt = datetime.combine(base_date, t)
+    if t < day_start:
+        return dt + timedelta(days=1)
+    return dt
+
+def format_range(start_dt: datetime, end_dt: datetime):
+    """Formats a datetime range for display."""
+    return f"{start_dt.strftime('%I:%M %p')} — {end_dt.strftime('%I:%M %p')}"
+
+def overlap(a_start, a_end, b_start, b_end):
+    """Checks if two time intervals overlap."""
+    return a_start < b_end and b_start < a_end
+
+@timed
+def normalize_schedule(tasks):
+    """
+    Ensures that tasks are sequential and don't overlap by shifting
+    the start time of a conflicting task to the end time of the previous one.
+    Tasks without an "id" are given one here.
+    """
+    if not tasks:
+        return []
+
+    # Sort tasks by start time
+    tasks_sorted = sorted(tasks, key=lambda x: x["start_time"])
+    fixed = []
+
+    for t in tasks_sorted:
+        current_task = t.copy()
+        if "id" not in current_task:
+            current_task["id"] = new_task_id()
+
+        if not fixed:
+            fixed.append(current_task)
+            continue
+
+        prev = fixed[-1]
+
+        # Check if the current task starts before the previous one ends
+        if current_task["start_time"] < prev["end_time"]:
+            dur = (current_task["end_time"] - current_task["start_time"])
+
+            # Shift the start time to the end of the previous task
+            current_task["start_time"] = prev["end_time"]
+
+            # Calculate the new end time
+            current_task["end_time"] = current_task["start_time"] + dur
+
+        fixed.append(current_task)
+
+    return fixed
+
+@timed
+def detect_conflict(tasks, new_task):
+    """
+    Returns the existing tasks that conflict with a new task (empty list if none).
+    Accepts a plain task list or an IntervalIndex; the index answers in O(log n + k).
+    """
+    if isinstance(tasks, IntervalIndex):
+        return tasks.overlapping(new_task["start_time"], new_task["end_time"])
+    return [t for t in tasks if overlap(new_task["start_time"], new_task["end_time"], t["start_time"], t["end_time"])]
+
+@timed
+def shift_after_insert(tasks, inserted_index):
+    """Shifts all tasks subsequent to the inserted index if they now overlap."""
+    tasks = tasks.copy()
+    for i in range(inserted_index + 1, len(tasks)):
+        prev = tasks[i-1]
+        cur = tasks[i]
+
+        if cur["start_time"] < prev["end_time"]:
+            cur = cur.copy()  # don't mutate dicts still referenced by day_tasks / the index
+            dur = cur["end_time"] - cur["start_time"]
+            cur["start_time"] = prev["end_time"]
+            cur["end_time"] = cur["start_time"] + dur
+            tasks[i] = cur
+
+    return tasks
+
+def seconds_until_change(now: datetime, ongoing=None, next_task=None, later=()):
+    """
+    Seconds until the status banner's text next changes: the next minute tick of the
+    ongoing/next countdown, or failing that the earliest future instant in `later`
+    (e.g. sleep time, end of the planner day). None if there is nothing to wait for.
+    """
+    if ongoing or next_task:
+        target = ongoing["end_time"] if ongoing else next_task["start_time"]
+        secs = (target - now).total_seconds()
+        if secs <= 0:
+            return 1.0
+        # Half a second of slack so we wake just after the minute rolls over
+        return (secs % 60 or 60) + 0.5
+    pending = [t for t in later if t > now]
+    if not pending:
+        return None
+    return (min(pending) - now).total_seconds() + 0.5
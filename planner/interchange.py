@@ -0,0 +1,396 @@
+# planner/interchange.py
+"""
+Streaming import and export of schedules as iCalendar (.ics) and CSV.
+
+Both directions are generator pipelines, so a file of any size passes
+through in bounded memory:
+
+    read_lines(path)  ->  ics_tasks() / csv_tasks()  ->  on_day(day)  ->  merge_tasks(schedule)
+    days              ->  ics_lines() / csv_lines()  ->  write_lines(path)
+
+read_lines() decodes the input in fixed-size chunks; the parsers hold one
+event (or CSV row) at a time. merge_tasks() checks the imported tasks for
+conflicts in one batch (planner.batch) and inserts them into a
+SortedSchedule, skipping or shifting around what they overlap.
+
+Only timed, one-off events are imported: all-day events, cancelled events
+and recurrence rules are skipped (an RRULE event imports its first
+occurrence).
+"""
+from collections import namedtuple
+import csv
+import hashlib
+from datetime import date, datetime, time, timedelta, timezone
+import io
+import os
+import re
+from urllib.parse import quote
+
+from .helpers import DAY_START, to_dt
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python < 3.9: TZID times are taken as local
+    ZoneInfo = None
+
+CHUNK = 1 << 16
+PROFILE_PROPERTY = "X-PLANNER-PROFILE"  # which profile an exported event belongs to
+TASK_FIELDS = ["name", "date", "id", "title", "start_time", "end_time"]
+_TICK = timedelta(microseconds=1)
+
+MergeResult = namedtuple("MergeResult", "added skipped duplicates moved")
+
+
+# -----------------------
+# Input
+# -----------------------
+def read_lines(source, chunk_size=CHUNK):
+    """
+    Yields the lines of a file path or binary file object (e.g. an upload)
+    without line endings. Files are read `chunk_size` bytes at a time, so
+    only the current chunk and line are held. A UTF-8 BOM is dropped.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb", buffering=chunk_size) as f:
+            yield from read_lines(f, chunk_size)
+        return
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", errors="replace")
+    try:
+        for line in text:
+            yield line.rstrip("\n")
+    finally:
+        text.detach()  # leave the caller's file open
+
+
+def parse_when(value, day):
+    """A task time: ISO datetime, or HH:MM placed on planner day `day`."""
+    if isinstance(value, datetime):
+        return value
+    if "T" in value or " " in value.strip():
+        return datetime.fromisoformat(value)
+    if day is None:
+        raise ValueError(f"time {value!r} needs a date (use --date or a date column)")
+    return to_dt(time.fromisoformat(value), day)
+
+
+def content_id(prefix, title, start, end):
+    """
+    ID for an imported task that brings none: derived from what it is, so
+    importing the same task again is recognized while two different files
+    never share IDs.
+    """
+    digest = hashlib.sha1(f"{title}\0{start.isoformat()}\0{end.isoformat()}".encode("utf-8")).hexdigest()
+    return f"{prefix}:{digest[:16]}"
+
+
+def csv_tasks(lines, day=None):
+    """Tasks from CSV rows with title,start_time,end_time (and optionally id, date) columns."""
+    for row in csv.DictReader(lines):
+        d = date.fromisoformat(row["date"]) if row.get("date") else day
+        start, end = parse_when(row["start_time"], d), parse_when(row["end_time"], d)
+        title = row.get("title", "")
+        if end > start:
+            # Namespaced like ICS UIDs, so a file's "work" or "1" never matches the schedule's
+            # task of that ID; a prefixed ID is from an earlier import and is kept as is
+            row_id = row.get("id")
+            if row_id:
+                task_id = row_id if row_id.startswith("csv:") else f"csv:{row_id}"
+            else:
+                task_id = content_id("csv", title, start, end)
+            yield {"id": task_id, "title": title, "start_time": start,
+                   "end_time": end, "meta": {"manual": True, "imported": True}}
+
+
+# -----------------------
+# iCalendar parsing
+# -----------------------
+def unfold(lines):
+    """Joins folded iCalendar lines (continuations start with a space or tab)."""
+    current = None
+    for line in lines:
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def _property(line):
+    """'DTSTART;TZID=Europe/Paris:20261017T090000' -> ("DTSTART", {"TZID": "Europe/Paris"}, "20261017T090000")."""
+    head, sep, value = line.partition(":")
+    if ";" not in head:
+        return head.upper(), _NO_PARAMS, value
+    # A ':' inside a quoted parameter value belongs to the head
+    while head.count('"') % 2 and sep:
+        more, sep, value = value.partition(":")
+        head += ":" + more
+    name, *params = head.split(";")
+    return name.upper(), dict(p.partition("=")[::2] for p in params), value
+
+
+_NO_PARAMS = {}
+
+
+def ics_events(lines):
+    """Yields each VEVENT as {NAME: (params, value)} (first occurrence of each property)."""
+    event, depth = None, 0
+    for line in unfold(lines):
+        name, params, value = _property(line)
+        if name == "BEGIN":
+            if event is not None:
+                depth += 1  # VALARM and friends: ignored
+            elif value.upper() == "VEVENT":
+                event, depth = {}, 0
+        elif name == "END":
+            if event is not None:
+                if depth:
+                    depth -= 1
+                elif value.upper() == "VEVENT":
+                    yield event
+                    event = None
+        elif event is not None and not depth:
+            event.setdefault(name, (params, value))
+
+
+def _unescape(text):
+    if "\\" not in text:
+        return text
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), text)
+
+
+def _ics_time(params, value):
+    """Local naive datetime for an iCalendar DATE-TIME; None for an all-day DATE."""
+    if params.get("VALUE", "").upper() == "DATE" or "T" not in value:
+        return None
+    v = value.strip()
+    if len(v) < 15 or v[8] != "T":
+        raise ValueError(f"bad iCalendar date-time {value!r}")
+    dt = datetime(int(v[:4]), int(v[4:6]), int(v[6:8]), int(v[9:11]), int(v[11:13]), int(v[13:15]))
+    if v.endswith("Z"):
+        return dt.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    tzid = params.get("TZID", "").strip('"')
+    if tzid and ZoneInfo is not None:
+        try:
+            return dt.replace(tzinfo=ZoneInfo(tzid)).astimezone().replace(tzinfo=None)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass  # unknown zone (e.g. a Windows name): keep the wall-clock time
+    return dt
+
+
+_DURATION = re.compile(r"([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+
+
+def _ics_duration(value):
+    m = _DURATION.match(value.strip())
+    if not m:
+        return None
+    sign, weeks, days, hours, minutes, seconds = m.groups()
+    delta = timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                      minutes=int(minutes or 0), seconds=int(seconds or 0))
+    return -delta if sign == "-" else delta
+
+
+def ics_tasks(lines):
+    """
+    Tasks from the timed, non-cancelled VEVENTs of an iCalendar stream. The
+    profile an event was exported for (PROFILE_PROPERTY) is kept in
+    meta["profile"].
+    """
+    for event in ics_events(lines):
+        if "DTSTART" not in event or event.get("STATUS", ({}, ""))[1].upper() == "CANCELLED":
+            continue
+        try:
+            start = _ics_time(*event["DTSTART"])
+            if start is None:
+                continue
+            if "DTEND" in event:
+                end = _ics_time(*event["DTEND"])
+            else:
+                length = _ics_duration(event["DURATION"][1]) if "DURATION" in event else None
+                end = start + length if length is not None else None
+        except ValueError:
+            continue  # malformed date: skip the event rather than the whole file
+        if end is None or end <= start:
+            continue
+        uid = event.get("UID", ({}, ""))[1]
+        title = _unescape(event.get("SUMMARY", ({}, ""))[1])
+        meta = {"manual": True, "imported": True}
+        if PROFILE_PROPERTY in event:
+            meta["profile"] = _unescape(event[PROFILE_PROPERTY][1])
+        yield {"id": f"ics:{uid}" if uid else content_id("ics", title, start, end), "title": title,
+               "start_time": start, "end_time": end, "meta": meta}
+
+
+def read_tasks(source, name=None, day=None):
+    """Tasks from an .ics or .csv file (path or file object); the format follows the (file) name."""
+    name = name or getattr(source, "name", None) or str(source)
+    lines = read_lines(source)
+    return csv_tasks(lines, day) if name.lower().endswith(".csv") else ics_tasks(lines)
+
+
+def on_day(tasks, day):
+    """The tasks that start on planner day `day` (DAY_START to DAY_START)."""
+    first = datetime.combine(day, DAY_START)
+    last = first + timedelta(days=1)
+    return (t for t in tasks if first <= t["start_time"] < last)
+
+
+# -----------------------
+# Merging
+# -----------------------
+def merge_tasks(schedule, tasks, on_conflict="skip"):
+    """
+    Inserts imported tasks into a SortedSchedule. Tasks whose ID is already
+    in the schedule (a calendar imported twice) are left out. Conflicts with
+    the schedule and among the imports are found in one batch;
+    on_conflict="skip" leaves such tasks out (earlier imports win), "shift"
+    inserts them and moves the later tasks out of the way as the Add Task
+    form does. Returns MergeResult(added, skipped, duplicates, moved).
+    """
+    from .batch import conflict_pairs  # pulls in NumPy when available
+
+    present = {t["id"] for t in schedule}
+    tasks, duplicates, seen = sorted(tasks, key=lambda t: t["start_time"]), 0, set()
+    fresh = []
+    for t in tasks:
+        if t["id"] in present or t["id"] in seen:
+            duplicates += 1
+        else:
+            seen.add(t["id"])
+            fresh.append(t)
+    if not fresh:
+        return MergeResult([], [], duplicates, [])
+
+    existing = list(schedule)
+    both = existing + fresh
+    origin = min(t["start_time"] for t in both)
+    pairs = conflict_pairs([(t["start_time"] - origin) // _TICK for t in both],
+                           [(t["end_time"] - origin) // _TICK for t in both])
+    clashes = {}  # position in fresh -> positions (in both) it overlaps
+    for i, j in pairs:
+        i, j = int(i), int(j)
+        for a, b in ((i, j), (j, i)):
+            if a >= len(existing):
+                clashes.setdefault(a - len(existing), set()).add(b)
+
+    n = len(existing)
+    added, skipped, moved = [], [], []
+    rejected, shifting = set(), False
+    for k, t in enumerate(fresh):
+        hits = clashes.get(k, ())
+        if on_conflict == "skip":
+            # Overlaps the schedule, or an earlier import that was kept
+            if any(b < n or (b - n < k and b - n not in rejected) for b in hits):
+                skipped.append(t)
+                rejected.add(k)
+                continue
+        elif hits:
+            shifting = True
+        if shifting:
+            # Once something has moved the batch result is stale; the ripple is cheap when nothing overlaps
+            moved.extend(schedule.insert_and_shift(t))
+        else:
+            schedule.insert(t)
+        added.append(t)
+    return MergeResult(added, skipped, duplicates, list({t["id"]: t for t in moved}.values()))
+
+
+# -----------------------
+# Export
+# -----------------------
+def _escape(text):
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line):
+    """Splits a content line into 75-octet pieces (RFC 5545), never inside a UTF-8 character."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    out, limit = [], 75
+    while data:
+        cut = min(limit, len(data))
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        out.append(data[:cut].decode("utf-8"))
+        data, limit = data[cut:], 74  # continuation lines start with a space
+    return "\r\n ".join(out) + "\r\n"
+
+
+def _stamp(dt):
+    return dt.strftime("%Y%m%dT%H%M%S")
+
+
+def ics_header(name="Planner"):
+    return ("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Life & Career Planner//EN\r\n"
+            + _fold(f"X-WR-CALNAME:{_escape(name)}"))
+
+
+ICS_FOOTER = "END:VCALENDAR\r\n"
+
+
+def ics_event(d, task, stamp, profile=""):
+    """
+    One VEVENT for a task of planner day d; times are floating (local).
+    `stamp` is the DTSTAMP value. With several profiles in one file, pass
+    each event's `profile` name: it goes into the UID (so UIDs stay unique)
+    and into PROFILE_PROPERTY, which ics_tasks() reads back.
+    """
+    if task["id"].startswith("ics:"):
+        uid = task["id"][4:]
+    else:
+        uid = "-".join(x for x in (d.isoformat(), quote(profile, safe=""), task["id"]) if x) + "@planner"
+    return ("BEGIN:VEVENT\r\n" + _fold(f"UID:{_escape(uid)}") + f"DTSTAMP:{stamp}\r\n"
+            f"DTSTART:{_stamp(task['start_time'])}\r\nDTEND:{_stamp(task['end_time'])}\r\n"
+            + _fold(f"SUMMARY:{_escape(task['title'])}")
+            + (_fold(f"{PROFILE_PROPERTY}:{_escape(profile)}") if profile else "") + "END:VEVENT\r\n")
+
+
+def ics_lines(days, name="Planner"):
+    """Yields an iCalendar file, one event at a time, for (date, tasks) pairs."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    yield ics_header(name)
+    for d, tasks in days:
+        for t in tasks:
+            yield ics_event(d, t, stamp)
+    yield ICS_FOOTER
+
+
+def csv_lines(days, name=""):
+    """Yields CSV text (header first, then one row per task) for (date, tasks) pairs."""
+    buf = io.StringIO()
+    rows = csv.DictWriter(buf, fieldnames=TASK_FIELDS)
+    rows.writeheader()
+    for d, tasks in days:
+        for t in tasks:
+            rows.writerow({"name": name, "date": d.isoformat() if d else "", "id": t["id"], "title": t["title"],
+                           "start_time": t["start_time"].isoformat(), "end_time": t["end_time"].isoformat()})
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()
+
+
+def export_lines(days, fmt, name=""):
+    """ics_lines or csv_lines by format name ("ics" / "csv")."""
+    return csv_lines(days, name) if fmt == "csv" else ics_lines(days, name or "Planner")
+
+
+def write_lines(lines, target, chunk_size=CHUNK):
+    """Writes streamed text to a path or text file object in chunks of about `chunk_size` characters."""
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "w", newline="", encoding="utf-8") as f:
+            return write_lines(lines, f, chunk_size)
+    pending, size, total = [], 0, 0
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            target.write("".join(pending))
+            total += size
+            pending, size = [], 0
+    target.write("".join(pending))
+    return total + size
@@ -0,0 +1,244 @@
+# planner/intervals.py
+"""Interval index used for conflict checks on the day schedule."""
+import random
+
+
+class _Node:
+    __slots__ = ("start", "end", "task", "prio", "left", "right", "max_end")
+
+    def __init__(self, start, end, task):
+        self.start = start
+        self.end = end
+        self.task = task
+        self.prio = random.random()
+        self.left = None
+        self.right = None
+        self.max_end = end
+
+
+def _update(node):
+    m = node.end
+    if node.left is not None and node.left.max_end > m:
+        m = node.left.max_end
+    if node.right is not None and node.right.max_end > m:
+        m = node.right.max_end
+    node.max_end = m
+
+
+def _split(node, start, inclusive=False):
+    """Splits a tree into (< start, >= start), or (<= start, > start) if inclusive."""
+    if node is None:
+        return None, None
+    if node.start < start or (inclusive and node.start == start):
+        left, right = _split(node.right, start, inclusive)
+        node.right = left
+        _update(node)
+        return node, right
+    left, right = _split(node.left, start, inclusive)
+    node.left = right
+    _update(node)
+    return left, node
+
+
+def _merge(a, b):
+    """Merges two trees where every start in a is <= every start in b."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.prio > b.prio:
+        a.right = _merge(a.right, b)
+        _update(a)
+        return a
+    b.left = _merge(a, b.left)
+    _update(b)
+    return b
+
+
+class IntervalIndex:
+    """
+    Interval tree (a treap keyed on start time, augmented with the max end
+    time of each subtree). Insert/remove are O(log n) and an overlap query
+    is O(log n + k) for k hits.
+    """
+
+    def __init__(self, tasks=()):
+        self._root = None
+        self._size = 0
+        for t in tasks:
+            self.add(t)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.task
+            node = node.right
+
+    def clear(self):
+        self._root = None
+        self._size = 0
+
+    def rebuild(self, tasks):
+        """Replaces the contents with `tasks`, in O(n) when they are sorted by start time."""
+        tasks = list(tasks)
+        if any(a["start_time"] > b["start_time"] for a, b in zip(tasks, tasks[1:])):
+            tasks.sort(key=lambda t: t["start_time"])
+        self._root = _build(tasks)
+        self._size = len(tasks)
+
+    def replace(self, old, new):
+        """
+        Swaps tasks `old` for `new` (e.g. moved copies). A few are updated in
+        place; when many change the tree is rebuilt in one pass instead.
+        """
+        if len(new) < _BULK:
+            for t in old:
+                self.remove(t)
+            for t in new:
+                self.add(t)
+            return
+        gone = {id(t) for t in old}
+        self.rebuild(sorted([t for t in self if id(t) not in gone] + list(new), key=lambda t: t["start_time"]))
+
+    def add(self, task):
+        """Indexes a task by its start_time/end_time."""
+        node = _Node(task["start_time"], task["end_time"], task)
+        left, right = _split(self._root, node.start)
+        self._root = _merge(_merge(left, node), right)
+        self._size += 1
+
+    def remove(self, task):
+        """Removes a task (matched by identity, then equality). Returns True if found."""
+        start = task["start_time"]
+        left, rest = _split(self._root, start)
+        # rest holds starts >= start; peel off the run with exactly this start
+        same, right = _split(rest, start, inclusive=True)
+        kept = _nodes(same)
+        hit = next((n for n in kept if n.task is task), None)
+        if hit is None:
+            hit = next((n for n in kept if n.task == task), None)
+        if hit is not None:
+            kept.remove(hit)
+            self._size -= 1
+        same = None
+        for n in kept:
+            n.left = n.right = None
+            n.max_end = n.end
+            same = _merge(same, n)
+        self._root = _merge(_merge(left, same), right)
+        return hit is not None
+
+    def overlapping(self, start, end):
+        """Returns the indexed tasks overlapping [start, end), ordered by start time."""
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            # Nothing in this subtree ends after our start
+            if node.max_end <= start:
+                continue
+            if node.right is not None and node.start < end:
+                stack.append(node.right)
+            if node.start < end and start < node.end:
+                found.append(node)
+            if node.left is not None:
+                stack.append(node.left)
+        found.sort(key=lambda n: n.start)
+        return [n.task for n in found]
+
+
+_BULK = 64  # replace(): from this many tasks on, rebuild rather than update
+
+
+def _build(tasks):
+    """
+    A balanced treap over tasks sorted by start time, in O(n). A node at
+    depth k gets priority 1 - 2**k / (n + 1), about what it would have in a
+    treap of random priorities, so the heap order holds and later adds and
+    removes behave as in any treap.
+    """
+    nodes = [_Node(t["start_time"], t["end_time"], t) for t in tasks]
+    scale = 1 / (len(nodes) + 1)
+
+    def link(lo, hi, depth):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        node = nodes[mid]
+        node.prio = 1 - (1 << depth) * scale
+        node.left, node.right = link(lo, mid, depth + 1), link(mid + 1, hi, depth + 1)
+        _update(node)
+        return node
+
+    return link(0, len(nodes), 0)
+
+
+def _nodes(node):
+    if node is None:
+        return []
+    return _nodes(node.left) + [node] + _nodes(node.right)
+
+
+class LayeredIndex(IntervalIndex):
+    """
+    An IntervalIndex over a shared, read-only base index. Tasks added here go
+    into this index's own tree; removing a base task only hides it, so the
+    base is never modified and can be shared by any number of sessions.
+    """
+
+    def __init__(self, base):
+        super().__init__()
+        self.base = base
+        self._hidden = set()  # id() of base tasks removed from this view
+
+    def __len__(self):
+        return len(self.base) - len(self._hidden) + self._size
+
+    def __iter__(self):
+        own = list(super().__iter__())
+        shown = [t for t in self.base if id(t) not in self._hidden]
+        return iter(sorted(shown + own, key=lambda t: t["start_time"]))
+
+    def clear(self):
+        super().clear()
+        self._hidden = {id(t) for t in self.base}
+
+    def rebuild(self, tasks):
+        self._hidden = {id(t) for t in self.base}
+        super().rebuild(tasks)
+
+    def replace(self, old, new):
+        if len(new) < _BULK:
+            return super().replace(old, new)
+        # Base tasks among `old` are hidden; this view's own tree is rebuilt without the rest
+        gone = {id(t) for t in old}
+        own = list(super().__iter__())
+        self._hidden |= gone - {id(t) for t in own}
+        IntervalIndex.rebuild(self, sorted([t for t in own if id(t) not in gone] + list(new), key=lambda t: t["start_time"]))
+
+    def remove(self, task):
+        if super().remove(task):
+            return True
+        start, end = task["start_time"], task["end_time"]
+        candidates = [t for t in (self.base.overlapping(start, end) if end > start else self.base)
+                      if id(t) not in self._hidden]
+        hit = next((t for t in candidates if t is task), None)
+        if hit is None:
+            hit = next((t for t in candidates if t == task), None)
+        if hit is None:
+            return False
+        self._hidden.add(id(hit))
+        return True
+
+    def overlapping(self, start, end):
+        found = [t for t in self.base.overlapping(start, end) if id(t) not in self._hidden]
+        found += super().overlapping(start, end)
+        found.sort(key=lambda t: t["start_time"])
+        return found
@@ -0,0 +1,144 @@
+# planner/packer.py
+"""
+Placement of flexible tasks (habits, meals) around fixed blocks.
+
+normalize_schedule only pushes tasks later, so a busy morning piles up into
+Work. pack() instead chooses start times that keep every flexible task
+inside the waking window and off the fixed blocks, minimising the total
+deviation from the preferred start times (in minutes).
+
+Tasks are taken in earliest-deadline order (preferred start + duration).
+A greedy pass places each one as close after its preferred time as it can;
+that answer is kept if the time budget runs out. A DP over a one-minute
+grid then finds the optimal placement for that order in O(tasks x minutes),
+a few milliseconds for a normal day.
+"""
+from datetime import timedelta
+import time
+
+from .diagnostics import timed
+
+_MINUTE = timedelta(minutes=1)
+_INF = float("inf")
+
+
+def preferred_start(task):
+    """Where the task would like to start: meta.preferred, else its current start."""
+    return task.get("meta", {}).get("preferred", task["start_time"])
+
+
+def _blocked_prefix(fixed, origin, length):
+    """Prefix sums over minutes [0, length): minute m is blocked if a fixed task covers it."""
+    blocked = [0] * length
+    for f in fixed:
+        a = max(0, (f["start_time"] - origin) // _MINUTE)
+        b = min(length, -((origin - f["end_time"]) // _MINUTE))  # ceil
+        for m in range(a, b):
+            blocked[m] = 1
+    prefix = [0]
+    for b in blocked:
+        prefix.append(prefix[-1] + b)
+    return prefix
+
+
+def _greedy(prefs, durs, prefix, length):
+    """Earliest free slot at or after the preferred time (else anywhere after the last task)."""
+    def fits(s, d):
+        return s + d <= length and prefix[s + d] == prefix[s]
+
+    def next_fit(s, d):
+        while s + d <= length:
+            if fits(s, d):
+                return s
+            s += 1
+        return None
+
+    starts, cursor = [], 0
+    for p, d in zip(prefs, durs):
+        s = next_fit(max(cursor, min(max(p, 0), length)), d)
+        if s is None:
+            s = next_fit(cursor, d)
+        starts.append(s)
+        if s is not None:
+            cursor = s + d
+    return starts
+
+
+def _dp(prefs, durs, prefix, length, deadline):
+    """Optimal starts for the tasks in this order, or None if infeasible or out of time."""
+    back = []
+    prev_best = None  # prefix minimum of the previous row: (cost, start)
+    for k, (p, d) in enumerate(zip(prefs, durs)):
+        if time.perf_counter() > deadline:
+            return None
+        best_cost, best_start = _INF, -1
+        row_cost, row_start = [], []
+        gap = durs[k - 1] if k else 0
+        for s in range(length):
+            cost = _INF
+            if s + d <= length and prefix[s + d] == prefix[s]:
+                if k == 0:
+                    cost = abs(s - p)
+                elif s - gap >= 0 and prev_best[0][s - gap] < _INF:
+                    cost = abs(s - p) + prev_best[0][s - gap]
+            if cost < best_cost:
+                best_cost, best_start = cost, s
+            row_cost.append(best_cost)
+            row_start.append(best_start)
+        back.append(row_start)
+        prev_best = (row_cost, row_start)
+    if not prefs or prev_best[0][-1] == _INF:
+        return None if prefs else []
+    starts = [0] * len(prefs)
+    s = back[-1][length - 1]
+    for k in range(len(prefs) - 1, -1, -1):
+        starts[k] = s
+        if k:
+            s = back[k - 1][s - durs[k - 1]]
+    return starts
+
+
+@timed
+def pack(tasks, fixed=(), window_start=None, window_end=None, budget=0.05):
+    """
+    Places flexible tasks around the fixed ones within [window_start, window_end).
+    Returns (placed, unplaced): placed are copies with new times and their
+    preferred start in meta["preferred"]; unplaced (no room left) are
+    returned unchanged. `budget` caps the optimiser in seconds; when it runs
+    out, the greedy placement is returned instead.
+    """
+    deadline = time.perf_counter() + budget
+    tasks = list(tasks)
+    if not tasks:
+        return [], []
+    prefs_dt = [preferred_start(t) for t in tasks]
+    origin = window_start if window_start is not None else min(prefs_dt)
+    end = window_end if window_end is not None else max(p + (t["end_time"] - t["start_time"]) for p, t in zip(prefs_dt, tasks))
+    length = max(0, (end - origin) // _MINUTE)
+    prefix = _blocked_prefix(fixed, origin, length)
+
+    order = sorted(range(len(tasks)), key=lambda i: (prefs_dt[i] + (tasks[i]["end_time"] - tasks[i]["start_time"]), i))
+    prefs = [(prefs_dt[i] - origin) // _MINUTE for i in order]
+    durs = [max(1, -((tasks[i]["start_time"] - tasks[i]["end_time"]) // _MINUTE)) for i in order]
+
+    starts = _greedy(prefs, durs, prefix, length)
+    kept = [k for k, s in enumerate(starts) if s is not None]
+    if kept:
+        better = _dp([prefs[k] for k in kept], [durs[k] for k in kept], prefix, length, deadline)
+        if better is not None:
+            for k, s in zip(kept, better):
+                starts[k] = s
+
+    placed, unplaced = [], []
+    for k, i in enumerate(order):
+        t = tasks[i]
+        if starts[k] is None:
+            unplaced.append(t)
+            continue
+        moved = dict(t)
+        moved["start_time"] = origin + starts[k] * _MINUTE
+        moved["end_time"] = moved["start_time"] + (t["end_time"] - t["start_time"])
+        moved["meta"] = {**t.get("meta", {}), "preferred": prefs_dt[i]}
+        placed.append(moved)
+    placed.sort(key=lambda t: t["start_time"])
+    return placed, unplaced
@@ -0,0 +1,113 @@
+# planner/recurrence.py
+"""
+Recurring tasks stored as rules rather than as copies.
+
+A rule is one small record in the profile: title, time of day, length and
+a repeat spec:
+
+    "daily"                  every day
+    "weekly:mon,wed,fri"     on the given weekdays ("weekdays" = mon-fri)
+    "every:3"                every 3rd day, counted from `since`
+    "monthly:15"             on the 15th (the last day in shorter months)
+
+Nothing is expanded up front: occurs_on() is O(1) per rule and day, and the
+day templates (templates.py) ask for the rules due on the day they build,
+so a year of recurring tasks costs one record per rule and only the days
+being looked at are materialized. Which rules fall on a day is cached.
+"""
+from calendar import monthrange
+from collections import namedtuple
+from datetime import date, time, timedelta
+from functools import lru_cache
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+Rule = namedtuple("Rule", "id title start_time minutes repeat since until fixed")
+
+
+@lru_cache(maxsize=256)
+def parse_repeat(repeat):
+    """("daily" | "weekly" | "every" | "monthly", value) for a repeat spec; raises ValueError."""
+    kind, _, arg = repeat.strip().lower().partition(":")
+    if kind == "daily" and not arg:
+        return "daily", None
+    if kind == "weekdays" and not arg:
+        return "weekly", frozenset(range(5))
+    if kind == "weekly":
+        days = frozenset(WEEKDAYS.index(d.strip()[:3]) for d in arg.split(",") if d.strip()[:3] in WEEKDAYS)
+        if days:
+            return "weekly", days
+    if kind == "every" and arg.isdigit() and int(arg) > 0:
+        return "every", int(arg)
+    if kind == "monthly" and arg.isdigit() and 1 <= int(arg) <= 31:
+        return "monthly", int(arg)
+    raise ValueError(f"bad repeat rule {repeat!r}")
+
+
+def rule_from(record):
+    """A Rule from a profile record (dict); times and dates may be objects or ISO strings."""
+    start = record["start_time"]
+    since, until = record.get("since"), record.get("until")
+    rule = Rule(
+        id=str(record.get("id") or record["title"]), title=record["title"],
+        start_time=start if isinstance(start, time) else time.fromisoformat(start),
+        minutes=int(record.get("minutes", 30)), repeat=record.get("repeat", "daily"),
+        since=since if isinstance(since, date) or since is None else date.fromisoformat(since),
+        until=until if isinstance(until, date) or until is None else date.fromisoformat(until),
+        fixed=bool(record.get("fixed")),
+    )
+    parse_repeat(rule.repeat)  # validate early
+    return rule
+
+
+def rule_record(rule):
+    """The profile record for a Rule (inverse of rule_from)."""
+    return {k: v for k, v in rule._asdict().items() if v is not None}
+
+
+def occurs_on(rule, day):
+    kind, value = parse_repeat(rule.repeat)
+    if (rule.since and day < rule.since) or (rule.until and day > rule.until):
+        return False
+    if kind == "daily":
+        return True
+    if kind == "weekly":
+        return day.weekday() in value
+    if kind == "every":
+        return (day - (rule.since or date.min)).days % value == 0
+    return day.day == min(value, monthrange(day.year, day.month)[1])
+
+
+@lru_cache(maxsize=1024)
+def rules_on(rules, day):
+    """The rules (a tuple) that fall on planner day `day`."""
+    return tuple(r for r in rules if occurs_on(r, day))
+
+
+def occurrences(rule, start, end):
+    """Lazily yields the dates in [start, end) the rule falls on."""
+    kind, value = parse_repeat(rule.repeat)
+    if rule.since and start < rule.since:
+        start = rule.since
+    if rule.until and end > rule.until + timedelta(days=1):
+        end = rule.until + timedelta(days=1)
+    day, step = start, timedelta(days=1)
+    if kind == "every" and rule.since:
+        day += timedelta(days=-(day - rule.since).days % value)
+        step = timedelta(days=value)
+    while day < end:
+        if occurs_on(rule, day):
+            yield day
+        day += step
+
+
+def describe_repeat(repeat):
+    """Human wording of a repeat spec, e.g. "Mon, Wed" or "every 3 days"."""
+    kind, value = parse_repeat(repeat)
+    if kind == "daily":
+        return "every day"
+    if kind == "weekly":
+        return "weekdays" if value == frozenset(range(5)) else ", ".join(WEEKDAYS[d].title() for d in sorted(value))
+    if kind == "every":
+        return f"every {value} days"
+    return f"monthly on day {value}"
@@ -0,0 +1,242 @@
+# planner/reminders.py
+"""
+Start/end reminders for everyone's tasks from one background event loop.
+
+ReminderService runs a single asyncio loop in a daemon thread. All users'
+upcoming boundaries (a task starting or ending) live in one heap, and the
+loop sleeps until the earliest one. sync() is called with a user's current
+schedule whenever it changes; only the reminders that differ are pushed,
+and ones that went away are dropped lazily when they reach the top of the
+heap. Due reminders are handed to every sink:
+
+    QueueSink    - per-user in-memory queue the app drains into st.toast
+    WebhookSink  - POSTs the reminder as JSON to a URL
+    DesktopSink  - notify-send / osascript, when available
+"""
+import asyncio
+from collections import OrderedDict, deque, namedtuple
+from datetime import datetime, timedelta
+import heapq
+import json
+import logging
+import shutil
+import sys
+import threading
+import time
+import urllib.request
+
+log = logging.getLogger(__name__)
+
+Reminder = namedtuple("Reminder", "user task_id title kind when")
+
+
+# -----------------------
+# Sinks: async callables taking a Reminder
+# -----------------------
+class QueueSink:
+    """
+    Keeps the latest reminders per user until the app collects them. A queue
+    exists only between a user's first uncollected reminder and the next
+    drain(); queues left undrained for `ttl` seconds (a closed browser tab)
+    are dropped, and at most `max_users` are kept (oldest dropped first), so
+    abandoned sessions don't pile up on a long-running server.
+    """
+
+    def __init__(self, maxlen=50, ttl=3600, max_users=10_000, clock=time.monotonic):
+        self.maxlen = maxlen
+        self.ttl = ttl
+        self.max_users = max_users
+        self.clock = clock
+        self._queues = OrderedDict()  # user -> (created, deque), oldest first
+        self._lock = threading.Lock()
+
+    async def __call__(self, reminder):
+        now = self.clock()
+        with self._lock:
+            entry = self._queues.get(reminder.user)
+            if entry is None:
+                self._prune(now)
+                entry = self._queues[reminder.user] = (now, deque(maxlen=self.maxlen))
+            entry[1].append(reminder)
+
+    def _prune(self, now):
+        queues = self._queues
+        while queues and (len(queues) >= self.max_users or next(iter(queues.values()))[0] <= now - self.ttl):
+            queues.popitem(last=False)
+
+    def drain(self, user):
+        """Returns and forgets the user's pending reminders, oldest first."""
+        with self._lock:
+            entry = self._queues.pop(user, None)
+        return list(entry[1]) if entry else []
+
+    def __len__(self):
+        """Users with uncollected reminders."""
+        return len(self._queues)
+
+
+class WebhookSink:
+    """POSTs {"user", "task_id", "title", "kind", "when"} to a URL (in a worker thread)."""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def _post(self, body):
+        req = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+    async def __call__(self, reminder):
+        body = json.dumps({**reminder._asdict(), "when": reminder.when.isoformat()}).encode()
+        await asyncio.get_running_loop().run_in_executor(None, self._post, body)
+
+
+class DesktopSink:
+    """Desktop notification via notify-send (Linux) or osascript (macOS); does nothing elsewhere."""
+
+    def __init__(self):
+        if shutil.which("notify-send"):
+            self._command = lambda title, text: ["notify-send", title, text]
+        elif sys.platform == "darwin" and shutil.which("osascript"):
+            self._command = lambda title, text: [
+                "osascript", "-e", f"display notification {json.dumps(text)} with title {json.dumps(title)}"]
+        else:
+            self._command = None
+
+    @property
+    def available(self):
+        return self._command is not None
+
+    async def __call__(self, reminder):
+        if self._command is None:
+            return
+        proc = await asyncio.create_subprocess_exec(*self._command("Planner", describe(reminder)))
+        await proc.wait()
+
+
+def describe(reminder):
+    verb = "starting" if reminder.kind == "start" else "ending"
+    return f"{reminder.title} is {verb} now ({reminder.when.strftime('%I:%M %p')})."
+
+
+# -----------------------
+# Service
+# -----------------------
+class ReminderService:
+    def __init__(self, sinks=(), lead=timedelta(0), clock=datetime.now):
+        self.sinks = list(sinks)
+        self.lead = lead            # start reminders fire this much early
+        self.clock = clock
+        self._heap = []             # (when, seq, user, key); key is (task_id, "start" | "end")
+        self._live = {}             # user -> {key: (seq, when, title)} for the current entries
+        self._size = 0              # entries in _live
+        self._seq = 0
+        self._loop = None
+        self._wake = None
+        self._sending = set()       # sink deliveries in flight
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+
+    # --- lifecycle ---
+    def start(self):
+        """Starts the loop thread (once)."""
+        with self._lock:
+            if self._loop is None:
+                threading.Thread(target=self._run, name="planner-reminders", daemon=True).start()
+                self._started.wait()
+        return self
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._wake = asyncio.Event()
+        self._started.set()
+        self._loop.run_until_complete(self._dispatch())
+
+    # --- scheduling (any thread) ---
+    def sync(self, user, tasks, is_done=lambda task_id: False):
+        """Replaces the user's reminders with the start/end of their unfinished tasks."""
+        wanted = {}
+        for t in tasks:
+            if is_done(t["id"]):
+                continue
+            wanted[(t["id"], "start")] = (t["start_time"] - self.lead, t["title"])
+            wanted[(t["id"], "end")] = (t["end_time"], t["title"])
+        self.start()
+        self._loop.call_soon_threadsafe(self._apply, user, wanted)
+
+    def clear(self, user):
+        self.sync(user, ())
+
+    def drain(self, user):
+        """The user's reminders collected by this service's QueueSinks."""
+        return [r for sink in self.sinks if isinstance(sink, QueueSink) for r in sink.drain(user)]
+
+    def pending(self, user=None):
+        """Number of live reminders (for one user, or everyone)."""
+        return self._size if user is None else len(self._live.get(user, ()))
+
+    # --- loop thread ---
+    def _apply(self, user, wanted):
+        """Diffs the user's wanted reminders against the live ones; O(user's tasks + changes x log heap)."""
+        now = self.clock()
+        live = self._live.setdefault(user, {})
+        before = len(live)
+        earliest = self._heap[0][0] if self._heap else None
+        for key in [key for key in live if key not in wanted]:
+            del live[key]  # its heap entry is skipped when it comes up
+        for key, (when, title) in wanted.items():
+            current = live.get(key)
+            if when <= now:
+                live.pop(key, None)
+            elif current is None or current[1:] != (when, title):
+                self._seq += 1
+                live[key] = (self._seq, when, title)
+                heapq.heappush(self._heap, (when, self._seq, user, key))
+        self._size += len(live) - before
+        if not live:
+            del self._live[user]
+        if len(self._heap) > 2 * self._size + 64:
+            # Mostly superseded entries: rebuild from the live set
+            self._heap = [(when, seq, u, key) for u, entries in self._live.items()
+                          for key, (seq, when, _) in entries.items()]
+            heapq.heapify(self._heap)
+        if self._heap and (earliest is None or self._heap[0][0] < earliest):
+            self._wake.set()
+
+    async def _dispatch(self):
+        while True:
+            self._wake.clear()
+            if not self._heap:
+                await self._wake.wait()
+                continue
+            when, seq, user, key = self._heap[0]
+            delay = (when - self.clock()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue  # re-check the top: it may have changed or not be due yet
+            heapq.heappop(self._heap)
+            live = self._live.get(user, {})
+            current = live.get(key)
+            if current is None or current[0] != seq:
+                continue  # superseded or removed
+            del live[key]
+            self._size -= 1
+            if not live:
+                del self._live[user]
+            fire_at = when + self.lead if key[1] == "start" else when
+            reminder = Reminder(user, key[0], current[2], key[1], fire_at)
+            for sink in self.sinks:
+                task = asyncio.ensure_future(self._deliver(sink, reminder))
+                self._sending.add(task)
+                task.add_done_callback(self._sending.discard)
+
+    async def _deliver(self, sink, reminder):
+        try:
+            await sink(reminder)
+        except Exception as exc:  # one failing sink must not stop the others or the loop
+            log.warning("reminder sink %s failed: %s", type(sink).__name__, exc)
@@ -0,0 +1,359 @@
+# planner/schedule.py
+"""Day schedule that stays sorted by start time between Streamlit reruns."""
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from types import MappingProxyType
+import uuid
+
+from .diagnostics import timed
+from .intervals import IntervalIndex, LayeredIndex
+
+
+def new_task_id():
+    """Stable identifier for a task that has none (manual entries, imports)."""
+    return uuid.uuid4().hex[:12]
+
+
+def freeze_task(task):
+    """Read-only view of a task dict (meta included), safe to share between sessions."""
+    task = dict(task)
+    if "meta" in task:
+        task["meta"] = MappingProxyType(dict(task["meta"]))
+    return MappingProxyType(task)
+
+
+def thaw_task(task):
+    """Plain, editable dict copy of a (possibly frozen) task."""
+    task = dict(task)
+    if "meta" in task:
+        task["meta"] = dict(task["meta"])
+    return task
+
+
+class FrozenSchedule:
+    """
+    An immutable, already sorted schedule (e.g. a day's template) that many
+    SortedSchedules can be layered on. Its tasks are read-only mappings and
+    its index is never modified after construction.
+    """
+
+    __slots__ = ("tasks", "starts", "index", "dirty")
+
+    def __init__(self, tasks):
+        tasks = sorted((freeze_task(t) for t in tasks), key=lambda x: x["start_time"])
+        self.tasks = tuple(tasks)
+        self.starts = tuple(t["start_time"] for t in tasks)
+        self.index = IntervalIndex(tasks)
+        self.dirty = any(a["end_time"] > b["start_time"] for a, b in zip(tasks, tasks[1:]))
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __iter__(self):
+        return iter(self.tasks)
+
+
+class SortedSchedule:
+    """
+    Tasks kept sorted by start_time (bisect on a parallel list of start keys),
+    with an IntervalIndex for conflict queries.
+
+    Mutations happen in place. `dirty` is set when an insert may have created
+    an overlap and cleared by `normalize()`; `version` bumps on every change so
+    callers can cache anything derived from the schedule.
+
+    Completion is tracked as a set of task IDs (moved copies keep their ID),
+    and `remaining` is kept up to date on every insert/remove/mark.
+
+    Built from a FrozenSchedule, the schedule shares the base's task tuple
+    and index until the first change: the task list is then copied (task
+    references only), and the index records just the added and hidden
+    tasks. A session that only ticks tasks off holds nothing but its set
+    of completed IDs.
+    """
+
+    def __init__(self, tasks=(), completed=()):
+        if isinstance(tasks, FrozenSchedule):
+            self.base = tasks
+            self._tasks = tasks.tasks
+            self._starts = tasks.starts
+            self.index = LayeredIndex(tasks.index)
+            self.dirty = tasks.dirty
+        else:
+            self.base = None
+            self._tasks = sorted(tasks, key=lambda x: x["start_time"])
+            for t in self._tasks:
+                if "id" not in t:
+                    t["id"] = new_task_id()
+            self._starts = [t["start_time"] for t in self._tasks]
+            self.index = IntervalIndex(self._tasks)
+            self.dirty = any(a["end_time"] > b["start_time"] for a, b in zip(self._tasks, self._tasks[1:]))
+        self.version = 0
+        ids = {t["id"] for t in self._tasks}
+        self._done = {i for i in completed if i in ids}
+        self.remaining = len(self._tasks) - len(self._done)
+
+    @classmethod
+    @timed
+    def from_changes(cls, base, added=(), removed=(), completed=()):
+        """Rebuilds a schedule from the output of changes(); base may be None."""
+        sched = cls(base) if base is not None else cls()
+        removed = set(removed)
+        for t in [t for t in sched if t["id"] in removed]:
+            sched.remove(t)
+        for t in added:
+            sched.insert(t)
+        ids = {t["id"] for t in sched}
+        sched._done = {i for i in completed if i in ids}
+        sched.remaining = len(sched) - len(sched._done)
+        sched.version = 0
+        return sched
+
+    def changes(self):
+        """
+        The schedule as a delta on its base: (added, removed), where added are
+        the tasks not shared with the base (manual tasks, moved copies) and
+        removed the IDs of base tasks no longer in the schedule.
+        """
+        if self.base is None:
+            return list(self._tasks), []
+        if self._tasks is self.base.tasks:
+            return [], []
+        shared = {t["id"]: t for t in self.base}
+        present = {id(t) for t in self._tasks}
+        added = [t for t in self._tasks if shared.get(t["id"]) is not t]
+        removed = [t["id"] for t in self.base if id(t) not in present]
+        return added, removed
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __iter__(self):
+        return iter(self._tasks)
+
+    def __getitem__(self, i):
+        return self._tasks[i]
+
+    def __eq__(self, other):
+        if isinstance(other, SortedSchedule):
+            other = other._tasks
+        return len(self._tasks) == len(other) and all(a == b for a, b in zip(self._tasks, other))
+
+    def tasks(self):
+        """Returns a shallow copy of the task list."""
+        return list(self._tasks)
+
+    def manual_tasks(self):
+        """Tasks added by hand on top of the template."""
+        return [t for t in self._tasks if t.get("meta", {}).get("manual")]
+
+    @property
+    def completed(self):
+        """IDs of the tasks marked done (read-only view)."""
+        return frozenset(self._done)
+
+    def is_done(self, task_id):
+        return task_id in self._done
+
+    def mark_done(self, task_id):
+        if task_id not in self._done:
+            self._done.add(task_id)
+            self.remaining -= 1
+            self._touch()
+
+    def mark_undone(self, task_id):
+        if task_id in self._done:
+            self._done.discard(task_id)
+            self.remaining += 1
+            self._touch()
+
+    def _touch(self):
+        self.version += 1
+
+    def _own(self):
+        """Copies the shared task list before the first change to it."""
+        if self.base is not None and self._tasks is self.base.tasks:
+            self._tasks = list(self._tasks)
+            self._starts = list(self._starts)
+
+    def _position(self, task):
+        lo = bisect_left(self._starts, task["start_time"])
+        hi = bisect_right(self._starts, task["start_time"], lo)
+        for i in range(lo, hi):
+            if self._tasks[i] is task:
+                return i
+        for i in range(lo, hi):
+            if self._tasks[i] == task:
+                return i
+        raise ValueError(f"task not in schedule: {task.get('title')!r}")
+
+    def insert(self, task):
+        """Inserts a task in start order and returns its position."""
+        if "id" not in task:
+            task["id"] = new_task_id()
+        self._own()
+        i = bisect_right(self._starts, task["start_time"])
+        self._tasks.insert(i, task)
+        self._starts.insert(i, task["start_time"])
+        self.index.add(task)
+        self.remaining += 1
+        if (i > 0 and self._tasks[i - 1]["end_time"] > task["start_time"]) or \
+                (i + 1 < len(self._tasks) and task["end_time"] > self._tasks[i + 1]["start_time"]):
+            self.dirty = True
+        self._touch()
+        return i
+
+    def remove(self, task):
+        """Removes a task from the schedule."""
+        i = self._position(task)
+        self._own()
+        del self._tasks[i]
+        del self._starts[i]
+        self.index.remove(task)
+        if task["id"] in self._done:
+            self._done.discard(task["id"])
+        else:
+            self.remaining -= 1
+        self._touch()
+
+    def shift(self, task, delta):
+        """Moves a task by a timedelta, keeping its duration. Returns the moved copy."""
+        done = self.is_done(task["id"])
+        self.remove(task)
+        moved = task.copy()
+        moved["start_time"] = task["start_time"] + delta
+        moved["end_time"] = task["end_time"] + delta
+        self.insert(moved)
+        if done:
+            self.mark_done(moved["id"])
+        return moved
+
+    @timed
+    def insert_and_shift(self, task):
+        """
+        Inserts a task and ripples the tasks after it forward just far enough
+        to clear it, stopping at the first task that no longer overlaps.
+        Tasks with meta.fixed never move; a flexible task that would land on
+        one is placed after it instead. The new task itself may also have to
+        start later: its times are updated in place, so it holds where it
+        ended up. Returns the existing tasks that moved (as new copies), so
+        the cost is linear in the ripple, not the whole day.
+        """
+        was_dirty = self.dirty
+        i = self.insert(task)
+        tasks = self._tasks
+        cursor = tasks[i - 1]["end_time"] if i > 0 else None
+        span = []
+        moved = []
+        j = i
+        while j < len(tasks):
+            t = tasks[j]
+            if j > i and t["start_time"] >= cursor:
+                break
+            if _is_fixed(t):
+                cursor = t["end_time"] if cursor is None else max(cursor, t["end_time"])
+                span.append(t)
+            else:
+                dur = t["end_time"] - t["start_time"]
+                start = t["start_time"] if cursor is None else max(t["start_time"], cursor)
+                start = self._clear_fixed(start, dur, t)
+                if start != t["start_time"]:
+                    self.index.remove(t)
+                    if j > i:
+                        t = t.copy()
+                        moved.append(t)
+                    t["start_time"] = start
+                    t["end_time"] = start + dur
+                    self.index.add(t)
+                cursor = t["end_time"]
+                span.append(t)
+            j += 1
+        # A task that hopped over a fixed block lands out of order; the span is
+        # nearly sorted already, so this is close to linear.
+        span.sort(key=lambda x: x["start_time"])
+        tasks[i:j] = span
+        self._starts[i:j] = [t["start_time"] for t in span]
+        self.dirty = was_dirty
+        if moved:
+            self._touch()
+        return moved
+
+    def _clear_fixed(self, start, dur, task):
+        """Pushes a start time past any fixed task it would overlap."""
+        while True:
+            hits = [h for h in self.index.overlapping(start, start + dur) if h is not task and _is_fixed(h)]
+            if not hits:
+                return start
+            start = max(h["end_time"] for h in hits)
+
+    @timed
+    def normalize(self):
+        """
+        Same rule as normalize_schedule, applied in place: a task that starts
+        before the previous one ends is pushed to that end time. As in
+        insert_and_shift, tasks with meta.fixed never move (fixed tasks that
+        overlap each other are left as they are) and a flexible task that
+        would land on one is placed after it. Does nothing when the schedule
+        is clean. Returns the moved tasks.
+        """
+        if not self.dirty:
+            return []
+        tasks = list(self._tasks)
+        # Fixed tasks never move here, so they are collected once; most days have one or none
+        flexible = [not _is_fixed(t) for t in tasks]
+        fixed = _FixedBlocks([t for t, flex in zip(tasks, flexible) if not flex])
+        cursor = None
+        replaced, moved = [], []
+        for i, t in enumerate(tasks):
+            if not flexible[i]:
+                continue
+            dur = t["end_time"] - t["start_time"]
+            start = t["start_time"] if cursor is None else max(t["start_time"], cursor)
+            if fixed:
+                start = fixed.clear(start, dur)
+            if start != t["start_time"]:
+                replaced.append(t)
+                t = t.copy()
+                t["start_time"] = start
+                t["end_time"] = start + dur
+                tasks[i] = t
+                moved.append(t)
+            cursor = t["end_time"]
+        self.dirty = False
+        if moved:
+            # One index update for the whole pass (a rebuild when much of the day moved)
+            self.index.replace(replaced, moved)
+            # Only a task that hopped over a fixed block is out of order
+            tasks.sort(key=lambda x: x["start_time"])
+            self._own()
+            self._tasks[:] = tasks
+            self._starts[:] = [t["start_time"] for t in tasks]
+            self._touch()
+        return moved
+
+
+def _is_fixed(task):
+    return bool(task.get("meta", {}).get("fixed"))
+
+
+class _FixedBlocks:
+    """The fixed tasks of a schedule, sorted by start, for pushing flexible tasks past them."""
+
+    __slots__ = ("starts", "reach")
+
+    def __init__(self, fixed):
+        fixed = sorted(fixed, key=lambda t: t["start_time"])
+        self.starts = [t["start_time"] for t in fixed]
+        self.reach = list(accumulate((t["end_time"] for t in fixed), max))  # latest end so far
+
+    def __bool__(self):
+        return bool(self.starts)
+
+    def clear(self, start, dur):
+        """Same as SortedSchedule._clear_fixed: the first start at or after `start` that overlaps no fixed task."""
+        while True:
+            # Blocks starting before the task ends overlap it iff one of them ends after it starts
+            i = bisect_left(self.starts, start + dur)
+            if not i or self.reach[i - 1] <= start:
+                return start
+            start = self.reach[i - 1]
@@ -0,0 +1,182 @@
+# planner/simulate.py
+"""
+What-if comparison of alternative routines.
+
+variants() crosses a profile with other shifts, habit orders and habit
+time offsets; each variant is a small spec (shift, morning order, evening
+order, offset) rather than a whole profile. simulate() builds every
+variant's template exactly as the Profile page does (templates.py: packed
+and normalized), scores it, and yields the results as they finish. The
+work is spread over a process pool in chunks, so it scales with cores;
+small runs stay in-process.
+
+Scores, per variant:
+    conflicts  pairs of tasks that overlap at their preferred times
+    drift      total minutes tasks were moved from their preferred start
+    free       waking minutes not taken by any task (a shift variant moves
+               the waking hours with the work hours, see apply_variant)
+Variants rank by fewest conflicts, then least drift, then most free time.
+"""
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timedelta
+from itertools import chain, islice, permutations
+from math import factorial
+import os
+
+from .packer import preferred_start
+from .templates import SHIFT_PRESETS, fresh_template, waking_window
+
+CURRENT = "Current"  # the profile's own work hours
+CHUNK = 64
+
+Variant = namedtuple("Variant", "shift morning evening offset")
+Result = namedtuple("Result", "variant conflicts drift free")
+
+_MINUTE = timedelta(minutes=1)
+
+
+# -----------------------
+# Variants
+# -----------------------
+def variants(profile, shifts=None, orders=True, offsets=(0,), limit=None):
+    """
+    Lazily yields Variants of a profile: each shift (SHIFT_PRESETS names or
+    CURRENT; default all of them) x each order of the morning and of the
+    evening habits (the habits swap time slots; only the current order when
+    `orders` is false) x each offset in minutes applied to all habit times.
+    """
+    shifts = list(SHIFT_PRESETS) + [CURRENT] if shifts is None else list(shifts)
+    morning = tuple(profile.get("morning_habits", ()))
+    evening = tuple(profile.get("evening_habits", ()))
+    morning_orders = permutations(morning) if orders else [morning]
+    evening_orders = list(permutations(evening)) if orders else [evening]
+    combos = (Variant(shift, m, e, offset)
+              for m in morning_orders for e in evening_orders for shift in shifts for offset in offsets)
+    return islice(combos, limit)
+
+
+def count_variants(profile, shifts=None, orders=True, offsets=(0,)):
+    """How many variants variants() would yield, without generating them."""
+    n = len(list(SHIFT_PRESETS) + [CURRENT] if shifts is None else shifts) * len(offsets)
+    if orders:
+        n *= factorial(len(profile.get("morning_habits", ()))) * factorial(len(profile.get("evening_habits", ())))
+    return n
+
+
+def _shift_time(t, minutes):
+    return (datetime.combine(datetime.min.date() + timedelta(days=1), t) + timedelta(minutes=minutes)).time()
+
+
+def _minutes_between(a, b):
+    """Minutes from time a to time b, the short way round the clock (-719..720)."""
+    diff = (b.hour * 60 + b.minute) - (a.hour * 60 + a.minute)
+    return (diff + 719) % 1440 - 719
+
+
+def apply_variant(profile, variant):
+    """
+    The profile as the variant describes it (a new dict; `profile` is not
+    changed). Another shift moves the waking hours along with the work
+    hours, so e.g. a night shift sleeps through the day rather than working
+    through the night.
+    """
+    p = dict(profile)
+    if variant.shift != CURRENT:
+        p["shift_type"] = variant.shift
+        p["work_start"], p["work_end"] = SHIFT_PRESETS[variant.shift]
+        moved = _minutes_between(profile["work_start"], p["work_start"])
+        for key in ("wake_time", "sleep_time"):
+            if profile.get(key):
+                p[key] = _shift_time(profile[key], moved)
+    for part, order in (("morning", variant.morning), ("evening", variant.evening)):
+        times = profile.get(f"{part}_times", {})
+        current = profile.get(f"{part}_habits", [])
+        # The habits trade places: the i-th habit of the new order takes the i-th habit's time
+        slots = [times[h] for h in current]
+        p[f"{part}_habits"] = list(order)
+        p[f"{part}_times"] = {h: _shift_time(t, variant.offset) for h, t in zip(order, slots)}
+    return p
+
+
+def describe_variant(variant):
+    parts = [variant.shift]
+    if variant.morning:
+        parts.append("morning: " + " → ".join(variant.morning))
+    if variant.evening:
+        parts.append("evening: " + " → ".join(variant.evening))
+    if variant.offset:
+        parts.append(f"habits {variant.offset:+d} min")
+    return " · ".join(parts)
+
+
+# -----------------------
+# Scoring
+# -----------------------
+def score(profile, day):
+    """(conflicts, drift minutes, free minutes) of the profile's template on `day`."""
+    from .batch import conflict_pairs  # pulls in NumPy when available
+
+    tasks = fresh_template(profile, day).tasks
+    if not tasks:
+        return 0, 0, 0
+    start, end = waking_window(day, profile.get("wake_time"), profile.get("sleep_time"))
+    origin = min(start, *(preferred_start(t) for t in tasks))
+    prefs = [(preferred_start(t) - origin) // _MINUTE for t in tasks]
+    lengths = [(t["end_time"] - t["start_time"]) // _MINUTE for t in tasks]
+    conflicts = len(conflict_pairs(prefs, [p + n for p, n in zip(prefs, lengths)]))
+    drift = sum(abs(t["start_time"] - preferred_start(t)) // _MINUTE for t in tasks)
+    busy = sum(max(0, (min(t["end_time"], end) - max(t["start_time"], start)) // _MINUTE) for t in tasks)
+    return conflicts, drift, (end - start) // _MINUTE - busy
+
+
+def rank_key(result):
+    return result.conflicts, result.drift, -result.free
+
+
+def _score_chunk(profile, chunk, day):
+    return [Result(v, *score(apply_variant(profile, v), day)) for v in chunk]
+
+
+def _chunks(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def simulate(profile, variant_iter, day, workers=None, chunk_size=CHUNK, executor=None):
+    """
+    Scores each variant of `profile` on `day` and yields Results as they
+    finish (not in input order). Work goes to `executor` if given, else to a
+    new process pool of `workers` processes (default: the CPU count); with a
+    single worker or a single chunk it runs in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(variant_iter, chunk_size)
+    first = next(chunks, None)
+    if first is None:
+        return
+    second = next(chunks, None)
+    if executor is None and (workers == 1 or second is None):
+        for chunk in chain([first], [second] if second else [], chunks):
+            yield from _score_chunk(profile, chunk, day)
+        return
+
+    own = executor is None
+    pool = ProcessPoolExecutor(max_workers=workers) if own else executor
+    queued = chain([first], [second] if second else [], chunks)
+    try:
+        # A couple of chunks per worker in flight: long variant streams never pile up in memory
+        pending = {pool.submit(_score_chunk, profile, chunk, day) for chunk in islice(queued, 2 * workers)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for chunk in islice(queued, len(done)):
+                pending.add(pool.submit(_score_chunk, profile, chunk, day))
+            for future in done:
+                yield from future.result()
+    finally:
+        if own:
+            pool.shutdown(cancel_futures=True)
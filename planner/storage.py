@@ -0,0 +1,228 @@
+# planner/storage.py
+"""
+Persistence for planner state (profile, template, day schedule).
+
+State is stored as JSON values keyed by (user, day, key); user-level values
+such as the profile use day "". The SQLite backend runs in WAL mode with a
+small connection pool, and writes are buffered and flushed in batches by a
+background thread, so a checkbox toggle never waits on an fsync.
+"""
+from abc import ABC, abstractmethod
+import atexit
+from contextlib import contextmanager
+from datetime import date, datetime, time
+import json
+import queue
+import sqlite3
+import threading
+from types import MappingProxyType
+
+
+# -----------------------
+# JSON encoding for the date/time values in planner state
+# -----------------------
+def _encode(obj):
+    if isinstance(obj, datetime):
+        return {"__datetime__": obj.isoformat()}
+    if isinstance(obj, date):
+        return {"__date__": obj.isoformat()}
+    if isinstance(obj, time):
+        return {"__time__": obj.isoformat()}
+    if isinstance(obj, (set, frozenset)):
+        return {"__set__": sorted(obj)}
+    if isinstance(obj, MappingProxyType):  # shared, read-only template tasks
+        return dict(obj)
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def _decode(obj):
+    if len(obj) == 1:
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        if "__date__" in obj:
+            return date.fromisoformat(obj["__date__"])
+        if "__time__" in obj:
+            return time.fromisoformat(obj["__time__"])
+        if "__set__" in obj:
+            return set(obj["__set__"])
+    return obj
+
+
+def dumps(value):
+    return json.dumps(value, default=_encode, separators=(",", ":"))
+
+
+def loads(text):
+    return json.loads(text, object_hook=_decode)
+
+
+class StateStore(ABC):
+    """Interface for persistence backends."""
+
+    @abstractmethod
+    def get(self, user, day, key, default=None):
+        ...
+
+    @abstractmethod
+    def load(self, user, day):
+        """All values for a user's day, with user-level values (day "") merged under them."""
+
+    @abstractmethod
+    def put(self, user, day, key, value):
+        ...
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class MemoryStore(StateStore):
+    """Process-local store; useful when no database file should be written."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, user, day, key, default=None):
+        with self._lock:
+            text = self._data.get((user, day, key))
+        return default if text is None else loads(text)
+
+    def load(self, user, day):
+        with self._lock:
+            items = [((d, k), v) for (u, d, k), v in self._data.items() if u == user and d in ("", day)]
+        # day-level values override user-level ones
+        return {k: loads(v) for (d, k), v in sorted(items, key=lambda item: item[0][0])}
+
+    def put(self, user, day, key, value):
+        with self._lock:
+            self._data[(user, day, key)] = dumps(value)
+
+
+class SQLiteStore(StateStore):
+    """
+    SQLite backend (WAL mode) with a connection pool and write-behind batching.
+
+    put() only records the latest value per (user, day, key) in memory; a
+    background thread writes pending values in one transaction every
+    `flush_interval` seconds, or sooner once `batch_size` values are queued.
+    Reads see pending values, so callers always read their own writes.
+    """
+
+    def __init__(self, path, pool_size=4, flush_interval=0.5, batch_size=200):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                " user TEXT NOT NULL, day TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " PRIMARY KEY (user, day, key))"
+            )
+        self._pending = {}
+        self._inflight = {}  # batch currently being written, still visible to reads
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_behind, name="planner-store-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)  # don't lose the last batch on shutdown
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    # --- reads ---
+    def get(self, user, day, key, default=None):
+        with self._lock:
+            text = self._pending.get((user, day, key), self._inflight.get((user, day, key)))
+        if text is not None:
+            return loads(text)
+        with self._connection() as conn:
+            row = conn.execute("SELECT value FROM state WHERE user=? AND day=? AND key=?", (user, day, key)).fetchone()
+        return default if row is None else loads(row[0])
+
+    def load(self, user, day):
+        # Buffers first: a value flushed after this snapshot is in the table by the time it is read
+        with self._lock:
+            buffered = {(d, k): v for batch in (self._inflight, self._pending)
+                        for (u, d, k), v in batch.items() if u == user and d in ("", day)}
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT day, key, value FROM state WHERE user=? AND day IN ('', ?) ORDER BY day",
+                (user, day)).fetchall()
+        values = {(d, k): v for d, k, v in rows}
+        values.update(buffered)
+        # day-level values override user-level ones
+        ordered = sorted(values.items(), key=lambda item: item[0][0])
+        return {k: loads(v) for (d, k), v in ordered}
+
+    # --- writes ---
+    def put(self, user, day, key, value):
+        text = dumps(value)
+        with self._lock:
+            self._pending[(user, day, key)] = text
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Writes all pending values in a single transaction."""
+        # One flush at a time, so a second one can't replace or clear the batch still being written
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return
+            try:
+                with self._connection() as conn:
+                    with conn:
+                        conn.execute("BEGIN")
+                        conn.executemany(
+                            "INSERT INTO state (user, day, key, value) VALUES (?, ?, ?, ?) "
+                            "ON CONFLICT (user, day, key) DO UPDATE SET value=excluded.value",
+                            [(u, d, k, v) for (u, d, k), v in batch.items()])
+            except sqlite3.Error:
+                # Put the batch back (newer puts win) so the next flush retries it
+                with self._lock:
+                    self._pending = {**batch, **self._pending}
+                raise
+            finally:
+                with self._lock:
+                    self._inflight = {}
+
+    def _write_behind(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass  # batch was re-queued; retry on the next tick
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+        while not self._pool.empty():
+            self._pool.get().close()
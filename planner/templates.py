@@ -0,0 +1,159 @@
+# planner/templates.py
+"""
+Daily template generation from a profile.
+
+The builder is a pure function of the template-relevant part of the profile
+(its fingerprint) and the date, so results are memoized: identical profiles,
+across sessions and users, share one normalized, read-only template per day
+(a FrozenSchedule) that each session's day schedule is layered on.
+
+Work is a fixed block; habits and meals are flexible and are placed by the
+packer between wake and sleep time, as close to their preferred times as
+the day allows (kept in meta["preferred"]). Recurring tasks (recurrence.py)
+are added on the days their rule falls on, as fixed or flexible tasks.
+Fixed tasks that overlap each other are kept as they are (see
+fixed_overlaps()); only the flexible ones are moved.
+"""
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+from .diagnostics import timed
+from .helpers import DAY_START, to_dt
+from .packer import pack
+from .recurrence import rule_from, rules_on
+from .schedule import FrozenSchedule, SortedSchedule, thaw_task
+
+# Typical shifts offered on the profile page: (work start, work end)
+SHIFT_PRESETS = {
+    "Morning shift (7–15)": (time(7, 0), time(15, 0)),
+    "Day shift (9–17)": (time(9, 0), time(17, 0)),
+    "Night shift (22–06)": (time(22, 0), time(6, 0)),
+}
+
+MORNING_MINUTES = {"Jogging/Walking": 30, "Meditation": 20, "Reading": 45}
+EVENING_MINUTES = {"Reading": 45}
+BREAKFAST_MINUTES = 20
+DINNER_MINUTES = 60
+
+
+def morning_minutes(habit):
+    return MORNING_MINUTES.get(habit, 20)
+
+
+def evening_minutes(habit):
+    return EVENING_MINUTES.get(habit, 30)
+
+
+def profile_fingerprint(profile):
+    """
+    Hashable snapshot of the profile fields that shape the template. Name and
+    role don't affect the schedule, so they are left out. Recurring rules are
+    included as Rule tuples (one per rule, however often it repeats).
+    """
+    morning = tuple(profile.get("morning_habits", []))
+    evening = tuple(profile.get("evening_habits", []))
+    return (
+        profile["work_start"], profile["work_end"],
+        tuple((h, profile["morning_times"][h]) for h in morning),
+        profile["breakfast_time"],
+        profile["dinner_time"],
+        tuple((h, profile["evening_times"][h]) for h in evening),
+        profile.get("wake_time"), profile.get("sleep_time"),
+        tuple(rule_from(r) for r in profile.get("rules", ())),
+    )
+
+
+def waking_window(day, wake_time=None, sleep_time=None):
+    """(start, end) of the waking hours on planner day `day`; the whole planner day if not given."""
+    start = to_dt(wake_time, day) if wake_time else datetime.combine(day, DAY_START)
+    end = to_dt(sleep_time, day) if sleep_time else datetime.combine(day + timedelta(days=1), DAY_START)
+    if end <= start:
+        end += timedelta(days=1)
+    return start, end
+
+
+def work_task(work_start, work_end, day):
+    """The fixed Work / College block on planner day `day` (an end before the start is the next morning)."""
+    ws = to_dt(work_start, day)
+    we = to_dt(work_end, day)
+    if we <= ws:
+        we += timedelta(days=1)
+    return {"id": "work", "title": "Work / College", "start_time": ws, "end_time": we, "meta": {"fixed": True}}
+
+
+def rule_task(rule, day):
+    """The task a recurring Rule adds on planner day `day`."""
+    s = to_dt(rule.start_time, day)
+    meta = {"rule": rule.id, "fixed": True} if rule.fixed else {"rule": rule.id}
+    return {"id": f"rule:{rule.id}", "title": rule.title, "start_time": s,
+            "end_time": s + timedelta(minutes=rule.minutes), "meta": meta}
+
+
+def fixed_overlaps(tasks):
+    """
+    (earlier, later) pairs of fixed tasks that overlap. Fixed blocks never
+    move, not even for each other, so the template keeps both as they are.
+    """
+    fixed = sorted((t for t in tasks if t.get("meta", {}).get("fixed")), key=lambda t: t["start_time"])
+    return [(a, b) for i, a in enumerate(fixed) for b in fixed[i + 1:] if b["start_time"] < a["end_time"]]
+
+
+@lru_cache(maxsize=512)
+@timed(name="template build")  # cache misses only
+def _template_for(fingerprint, day):
+    work_start, work_end, morning, breakfast_time, dinner_time, evening, wake_time, sleep_time, rules = fingerprint
+
+    template = []
+
+    # 1. Morning Habits
+    for h, t in morning:
+        s = to_dt(t, day)
+        template.append({"id": f"morning:{h}", "title": h, "start_time": s, "end_time": s + timedelta(minutes=morning_minutes(h))})
+
+    # 2. Breakfast
+    bstart = to_dt(breakfast_time, day)
+    template.append({"id": "breakfast", "title": "Breakfast", "start_time": bstart, "end_time": bstart + timedelta(minutes=BREAKFAST_MINUTES)})
+
+    # 3. Work / College (main block)
+    work = work_task(work_start, work_end, day)
+
+    # 4. Dinner
+    dstart = to_dt(dinner_time, day)
+    template.append({"id": "dinner", "title": "Dinner", "start_time": dstart, "end_time": dstart + timedelta(minutes=DINNER_MINUTES)})
+
+    # 5. Evening Habits
+    for h, t in evening:
+        s = to_dt(t, day)
+        template.append({"id": f"evening:{h}", "title": h, "start_time": s, "end_time": s + timedelta(minutes=evening_minutes(h))})
+
+    # 6. Recurring tasks that fall on this day
+    fixed = [work]
+    for rule in rules_on(rules, day):
+        (fixed if rule.fixed else template).append(rule_task(rule, day))
+
+    # Everything else is flexible: fit it around the fixed blocks within the waking hours.
+    # Tasks that don't fit anywhere stay at their preferred time and are then pushed
+    # past what they overlap; the fixed blocks never move (not even for each other).
+    placed, unplaced = pack(template, fixed, *waking_window(day, wake_time, sleep_time))
+    schedule = SortedSchedule(fixed + placed + unplaced)
+    schedule.normalize()
+    return FrozenSchedule(schedule)
+
+
+def shared_template(profile, day):
+    """The process-wide FrozenSchedule for a profile's template on a given date."""
+    return _template_for(profile_fingerprint(profile), day)
+
+
+def fresh_template(profile, day):
+    """Like shared_template, but built without using (or filling) the shared cache, e.g. for one-off variants."""
+    return _template_for.__wrapped__(profile_fingerprint(profile), day)
+
+
+def build_template(profile, day):
+    """Normalized template tasks for a profile on a given date (fresh dicts, safe to edit)."""
+    return [thaw_task(t) for t in shared_template(profile, day)]
+
+
+def template_cache_info():
+    return _template_for.cache_info()
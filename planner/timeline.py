@@ -0,0 +1,51 @@
+# planner/timeline.py
+"""Precomputed view of a day's unfinished tasks for O(log n) status lookups."""
+from bisect import bisect_left, bisect_right
+
+
+class Timeline:
+    """
+    Start/end boundaries of the unfinished tasks, built once per change to the
+    schedule or its completion state and then queried with bisect.
+
+    `tasks` must be sorted by start time. `carried` are tasks from the day
+    before that are still running (e.g. a night shift); they take part in the
+    status but not in "all done". Tasks may overlap, so a prefix maximum of
+    end times is kept to find the first task still running.
+    """
+
+    def __init__(self, tasks, is_done, carried=(), sleep_at=None, day_end=None):
+        self._tasks = list(carried)
+        total = remaining = 0
+        for t in tasks:
+            total += 1
+            if not is_done(t["id"]):
+                remaining += 1
+                self._tasks.append(t)
+        self._starts = [t["start_time"] for t in self._tasks]
+        self._reach = []  # latest end time among tasks[0..i]
+        for t in self._tasks:
+            self._reach.append(max(self._reach[-1], t["end_time"]) if self._reach else t["end_time"])
+        self.sleep_at = sleep_at
+        self.day_end = day_end
+        self.all_done = total > 0 and remaining == 0
+        instants = set(self._starts)
+        instants.update(t["end_time"] for t in self._tasks)
+        instants.update(x for x in (sleep_at, day_end) if x is not None)
+        self._boundaries = sorted(instants)
+
+    def status(self, now):
+        """(ongoing, next_task): the first unfinished task running at `now`, else the next to start."""
+        started = bisect_right(self._starts, now)
+        k = bisect_left(self._reach, now, 0, started)
+        if k < started:
+            return self._tasks[k], None
+        return None, (self._tasks[started] if started < len(self._tasks) else None)
+
+    def next_boundary(self, now):
+        """The next instant after `now` at which the status can change, or None."""
+        i = bisect_right(self._boundaries, now)
+        return self._boundaries[i] if i < len(self._boundaries) else None
+
+    def sleeping(self, now):
+        return self.sleep_at is not None and now >= self.sleep_at
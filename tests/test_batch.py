@@ -0,0 +1,74 @@
+# tests/test_batch.py
+"""
+planner.batch must give the same answers as the pure-Python code it speeds
+up: normalize_tasks as normalize_schedule, conflict_pairs and conflict_mask
+as a brute-force overlap check. Run on random days with NumPy and with the
+plain-Python fallback.
+"""
+from datetime import datetime, timedelta
+import random
+
+import pytest
+
+from planner import batch
+from planner.helpers import normalize_schedule, overlap
+
+TRIALS = 300
+DAY = datetime(2026, 10, 17, 4, 0)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        if batch.np is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(batch, "np", None)
+    return request.param
+
+
+def random_tasks(rng):
+    tasks = []
+    for n in range(rng.randint(0, 25)):
+        # Whole minutes plus odd seconds, with repeated starts and back-to-back tasks
+        start = DAY + timedelta(minutes=rng.randrange(0, 20 * 60, rng.choice([1, 15, 30])), seconds=rng.choice([0, 0, 7]))
+        tasks.append({"id": f"t{n}", "title": f"Task {n}", "start_time": start,
+                      "end_time": start + timedelta(minutes=rng.randint(1, 180))})
+    return tasks
+
+
+def as_ticks(tasks):
+    starts = [(t["start_time"] - DAY) // timedelta(microseconds=1) for t in tasks]
+    ends = [(t["end_time"] - DAY) // timedelta(microseconds=1) for t in tasks]
+    return starts, ends
+
+
+def brute_force_pairs(tasks):
+    return {frozenset((i, j)) for i in range(len(tasks)) for j in range(i + 1, len(tasks))
+            if overlap(tasks[i]["start_time"], tasks[i]["end_time"], tasks[j]["start_time"], tasks[j]["end_time"])}
+
+
+def test_normalize_tasks_matches_normalize_schedule(backend):
+    rng = random.Random(6)
+    for _ in range(TRIALS):
+        tasks = random_tasks(rng)
+        assert batch.normalize_tasks(tasks) == normalize_schedule(tasks)
+
+
+def test_conflict_pairs_match_brute_force(backend):
+    rng = random.Random(7)
+    for _ in range(TRIALS):
+        tasks = random_tasks(rng)
+        pairs = [(int(i), int(j)) for i, j in batch.conflict_pairs(*as_ticks(tasks))]
+        assert len(pairs) == len(set(map(frozenset, pairs)))
+        assert set(map(frozenset, pairs)) == brute_force_pairs(tasks)
+        # i comes before j in start order
+        assert all(tasks[i]["start_time"] <= tasks[j]["start_time"] for i, j in pairs)
+
+
+def test_conflict_mask_matches_brute_force(backend):
+    rng = random.Random(8)
+    for _ in range(TRIALS):
+        tasks = random_tasks(rng)
+        expected = set().union(*brute_force_pairs(tasks))
+        assert [bool(x) for x in batch.conflict_mask(*as_ticks(tasks))] == [i in expected for i in range(len(tasks))]
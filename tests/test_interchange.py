@@ -0,0 +1,41 @@
+# tests/test_interchange.py
+"""Importing a CSV into a day must only treat real re-imports as duplicates."""
+from datetime import date, time
+
+from planner.helpers import to_dt
+from planner.interchange import csv_tasks, merge_tasks
+from planner.schedule import SortedSchedule
+
+DAY = date(2026, 10, 17)
+
+
+def day_with_work():
+    return SortedSchedule([{"id": "work", "title": "Work / College", "start_time": to_dt(time(9, 0), DAY),
+                            "end_time": to_dt(time(17, 0), DAY), "meta": {"fixed": True}}])
+
+
+def rows(text):
+    return csv_tasks(text.splitlines(), DAY)
+
+
+def test_csv_id_does_not_match_a_schedule_task_of_that_id():
+    schedule = day_with_work()
+    result = merge_tasks(schedule, rows("id,title,start_time,end_time\nwork,Gym,18:00,19:00\n"))
+    assert [t["title"] for t in result.added] == ["Gym"]
+    assert result.duplicates == 0
+    assert [t["title"] for t in schedule] == ["Work / College", "Gym"]
+
+
+def test_reimport_is_a_duplicate():
+    schedule = day_with_work()
+    text = "id,title,start_time,end_time\nwork,Gym,18:00,19:00\n"
+    merge_tasks(schedule, rows(text))
+    again = merge_tasks(schedule, rows(text))
+    assert again.added == [] and again.duplicates == 1
+
+
+def test_rows_without_ids_from_different_files_are_kept():
+    schedule = day_with_work()
+    merge_tasks(schedule, rows("title,start_time,end_time\nDentist,07:00,08:00\n"))
+    result = merge_tasks(schedule, rows("title,start_time,end_time\nTeam sync,18:00,18:30\n"))
+    assert result.duplicates == 0 and [t["title"] for t in result.added] == ["Team sync"]